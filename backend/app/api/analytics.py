@@ -1,3 +1,4 @@
+from anyio import from_thread
 from fastapi import APIRouter, Depends
 from app.database import get_db
 from app import models
@@ -5,6 +6,7 @@ from app.services.sentiment_analysis import calculate_sentiment_score
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.api.auth import get_current_user
+from app.services.context_cache import context_cache
 from datetime import datetime, timedelta
 
 router = APIRouter()
@@ -95,4 +97,5 @@ def delete_action_item(action_item_id: int, current_user: models.User = Depends(
         raise HTTPException(status_code=404, detail="Action item not found")
     db.delete(action_item)
     db.commit()
+    from_thread.run(context_cache.invalidate, current_user.id)
     return {"message": "Action item deleted successfully"}
\ No newline at end of file
@@ -14,7 +14,6 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
 
-    print(f"DEBUG: Received password: {user.password!r}, length: {len(user.password)}")
     # Create user with a hashed password
     new_user = models.User(
         email=user.email,
@@ -1,12 +1,15 @@
+from anyio import from_thread
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models
-from typing import List
 from app.api.auth import get_current_user
 from app.services.embedding_service import generate_query_embedding
 from app.services.profile_service import generate_profile_summary
 from app.services.encryption import decrypt_data
+from app.services.context_cache import context_cache
+from app.services.memory_digest import discard_digests_including
+from app.services.post_session import enqueue_digest_rebuild, worker_pool
 
 router = APIRouter()
 
@@ -105,7 +108,7 @@ def delete_conversation(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Delete a conversation and all its messages"""
+    """Delete a conversation and all its messages, and anything derived from it"""
 
     conversation = (
         db.query(models.Conversation)
@@ -120,7 +123,16 @@ def delete_conversation(
         raise HTTPException(status_code=403, detail="Forbidden")
 
     db.delete(conversation)
+    # Its summary may be folded into the memory digest; drop the digest and
+    # queue a rebuild without it, committed with the delete
+    digest_discarded = discard_digests_including(db, current_user.id, conversation.id)
+    if digest_discarded:
+        enqueue_digest_rebuild(db, current_user.id)
     db.commit()
+    # The deleted summary may be part of the cached session context
+    from_thread.run(context_cache.invalidate, current_user.id)
+    if digest_discarded:
+        from_thread.run_sync(worker_pool.notify)
     return {"message": "Conversation deleted successfully"}
 
 
@@ -144,7 +156,7 @@ def search_conversations(
         List of top 10 most relevant conversations with similarity scores
     """
 
-    query_embedding = generate_query_embedding(query)
+    query_embedding = from_thread.run(generate_query_embedding, query)
     distance = models.Conversation.embedding.cosine_distance(query_embedding).label(
         "distance"
     )
@@ -216,11 +228,12 @@ def complete_onboarding(
     ]
 
     # Generate profile summary
-    profile_summary = generate_profile_summary(transcript)
+    profile_summary = from_thread.run(generate_profile_summary, transcript)
 
     # Update user
     current_user.onboarding_completed = True
     current_user.profile_summary = profile_summary
     db.commit()
+    from_thread.run(context_cache.invalidate, current_user.id)
 
     return {"message": "Onboarding completed", "profile_summary": profile_summary}
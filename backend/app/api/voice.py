@@ -1,208 +1,376 @@
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app import models
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 import websockets
 import json
+import base64
+import binascii
 import asyncio
-import os
+import itertools
+import logging
+import time
 from app.services.coach_prompts import SOCIAL_COACH_PROMPT, ONBOARDING_PROMPT
-from app.database import SessionLocal
-import traceback
+from app.database import AsyncSessionLocal
 from app.services.security import decode_access_token
-from app.services.embedding_service import generate_conversation_embedding
-from app.services.conversation_summary import generate_conversation_summary
-from app.services.encryption import encrypt_data, decrypt_data
-from app.services.audio_converter import combine_and_convert_audio
-from app.services.hume_service import analyze_emotion_with_hume
-from hume.expression_measurement.stream import StreamErrorMessage
-import tempfile
-from datetime import datetime, timedelta
-from openai import AsyncOpenAI
-from app.services.action_items_service import generate_action_items
+from app.services.encryption import encrypt_many
+from app.services.audio_recorder import SessionAudioRecorder
+from app.services.audio_coalescer import AudioCoalescer
+from app.services.realtime_events import classify_event
+from app.services.downlink_filter import DownlinkFilter
+from app.services.hume_service import extract_windows
+from app.services.live_emotion import LIVE_EMOTION_ANALYSIS, LiveEmotionAnalyzer
+from app.services.post_session import enqueue_post_session_job, worker_pool
+from app.services.moderation import ModerationPipeline
+from app.services.voice_store import get_user, create_conversation, create_action_item, save_transcript
+from app.services.session_context import get_user_context
+from app.services.context_cache import context_cache
+from app.services.realtime_pool import realtime_pool
+from app.services import metrics
+from app.services.tracing import tracer
 
 router = APIRouter()
-
-# Initialize OpenAI client for moderation
-openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
 
 # Constants
 MAX_TITLE_LENGTH = 50  # Maximum characters for conversation title
 
 
-async def check_content_moderation(text: str, user_id: int, db: Session) -> dict:
-    """Check text against OpenAI Moderation API for policy violations."""
-    try:
-        response = await openai_client.moderations.create(input=text)
-        result = response.results[0]
-        
-        if result.flagged:
-            print(f"⚠️ MODERATION VIOLATION - User {user_id}: {result.categories.model_dump()}")
-            
-        return {
-            "flagged": result.flagged,
-            "categories": result.categories.model_dump()
-        }
-    except Exception as e:
-        # Fail open on moderation errors
-        print(f"Moderation check failed for user {user_id}: {e}")
-        return {"flagged": False, "categories": {}}
-
-
 async def relay_client_to_openai(
-    client_ws: WebSocket, openai_ws, audio_chunks: list[bytes]
+    client_ws: WebSocket, openai_ws, recorder: SessionAudioRecorder
 ):
     """Forward audio from browser to OpenAI Realtime API.
 
     Continuously receives audio data from the client WebSocket and forwards
     it to the OpenAI Realtime API WebSocket until disconnection or error.
 
+    Clients may send audio either as JSON text frames carrying base64
+    `input_audio_buffer.append` events, or as binary frames of raw PCM16
+    (24 kHz mono). Binary frames skip the per-frame JSON parse and base64
+    overhead. Either way, audio is coalesced into larger append events
+    before it goes upstream; control messages flush pending audio first.
+
     Args:
         client_ws: WebSocket connection to the browser client
         openai_ws: WebSocket connection to OpenAI Realtime API
+        recorder: Session audio recorder for raw PCM16 uplink audio
 
     Raises:
         WebSocketDisconnect: When client disconnects
     """
+    coalescer = AudioCoalescer(openai_ws.send)
+    flush_timer = asyncio.create_task(coalescer.run_timer())
+    uplink = metrics.RelayCounter("uplink")
     try:
         while True:
-            data = await client_ws.receive_text()
+            frame = await client_ws.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000), frame.get("reason"))
+
+            # Binary frame: raw PCM16 audio
+            pcm = frame.get("bytes")
+            if pcm is not None:
+                uplink.add(len(pcm))
+                if pcm:
+                    recorder.write(pcm)
+                    await coalescer.append(pcm)
+                continue
 
-            # Parse and store audio chunks
+            data = frame.get("text")
+            if data is None:
+                continue
+            uplink.add(len(data))
+
+            # Parse and coalesce audio chunks, forward everything else as-is
             try:
                 message = json.loads(data)
                 if message.get("type") == "input_audio_buffer.append" and message.get("audio"):
-                    audio_chunks.append(message["audio"])
-            except json.JSONDecodeError:
+                    pcm = base64.b64decode(message["audio"])
+                    recorder.write(pcm)
+                    await coalescer.append(pcm)
+                    continue
+            except (json.JSONDecodeError, binascii.Error):
                 pass  # Malformed messages don't break the stream
 
-            await openai_ws.send(data)
+            await coalescer.send_event(data)
 
     except WebSocketDisconnect:
+        await coalescer.flush()
         await openai_ws.close()
     except websockets.exceptions.ConnectionClosed as e:
-        print(f"Client relay - OpenAI WS closed: code={e.code}, reason={e.reason}")
-    except Exception as e:
-        print(f"Error in client relay: {e}")
-        traceback.print_exc()
+        logger.info("Client relay - OpenAI WS closed: code=%s, reason=%s", e.code, e.reason)
+    except Exception:
+        logger.exception("Error in client relay")
         try:
             await openai_ws.close()
         except Exception:
             pass
+    finally:
+        flush_timer.cancel()
+        uplink.flush()
 
 
-async def relay_openai_to_client(openai_ws, client_ws: WebSocket, transcript, user_id: int, db: Session, conversation_id: int):
+async def relay_openai_to_client(openai_ws, client_ws: WebSocket, transcript, user_id: int, conversation_id: int, live_emotion: LiveEmotionAnalyzer | None = None):
     """Forward OpenAI responses to browser and capture transcript.
 
     Streams events from OpenAI Realtime API to the client browser while
     extracting and storing user/assistant transcriptions for database persistence.
-    Includes real-time content moderation to block harmful content.
+    Includes real-time content moderation to block harmful content; it runs
+    as a side task so moderation round-trips never delay audio forwarding.
 
     Args:
         openai_ws: WebSocket connection to OpenAI Realtime API
         client_ws: WebSocket connection to the browser client
         transcript: List to append transcript messages to (modified in-place)
-        user_id: User ID for moderation logging
-        db: Database session for logging violations
+        user_id: User ID for moderation logging and action items
+        live_emotion: Optional analyzer that gets each finished user turn
     """
     
-    user_message_buffer = []  # Buffer to aggregate user transcription chunks
+    user_message_buffer = []  # (moderation key, text) chunks of the user turn in progress
+    user_turn_of = {}  # Moderation key -> transcript entry the chunk was saved in
+    moderation_keys = itertools.count()
+    downlink_filter = DownlinkFilter()
+    downlink = metrics.RelayCounter("downlink")
+    speech_stopped_at = None  # Start of the current turn's response latency
+    turn_span = None  # From speech_started to the assistant's transcript
+    turn_audio_start_ms = None  # Recorder offset of the current user turn
+
+    async def on_flagged(key: int, text: str, result: dict):
+        """Drop the flagged turn from the transcript and terminate the session."""
+        message = user_turn_of.pop(key, None)
+        if message is not None:
+            transcript[:] = [m for m in transcript if m is not message]
+        else:
+            user_message_buffer[:] = [chunk for chunk in user_message_buffer if chunk[0] != key]
+
+        warning = {
+            "type": "error",
+            "error": {
+                "message": "Session terminated: Content policy violation detected.",
+                "code": "content_policy_violation"
+            }
+        }
+        try:
+            await client_ws.send_text(json.dumps(warning))
+        except Exception:
+            pass
+        finally:
+            try:
+                await client_ws.close(code=1008, reason="Content policy violation")
+            except Exception:
+                pass
+            await openai_ws.close()
+
+    moderation = ModerationPipeline(user_id, on_flagged)
+    moderation_task = asyncio.create_task(moderation.run())
 
     try:
         async for message in openai_ws:
-            try:
-                event = json.loads(message)
-            except json.JSONDecodeError:
+            # Only the few event types we act on get fully decoded
+            event_type, event = classify_event(message)
+            if event_type is None:
                 continue
 
-
-            # Forward to client (ignore if disconnected)
-            try:
-                await client_ws.send_text(message)
-            except (WebSocketDisconnect, RuntimeError):
-                break
+            if event_type == "response.output_audio.delta":
+                if speech_stopped_at is not None:
+                    metrics.TURN_LATENCY_SECONDS.observe(time.perf_counter() - speech_stopped_at)
+                    speech_stopped_at = None
+                    if turn_span is not None:
+                        turn_span.add_event("first_audio_delta")
+            elif event_type == "input_audio_buffer.speech_started":
+                if turn_span is not None:
+                    turn_span.end()
+                turn_span = tracer.start_span("voice.turn", attributes={"conversation.id": conversation_id})
+                # Turn boundaries are only decoded when something uses them
+                if live_emotion is not None:
+                    turn_audio_start_ms = json.loads(message).get("audio_start_ms")
+            elif event_type == "input_audio_buffer.speech_stopped":
+                speech_stopped_at = time.perf_counter()
+                if turn_span is not None:
+                    turn_span.add_event("speech_stopped")
+                # audio_*_ms count from the start of the input buffer, which the recorder mirrors
+                if live_emotion is not None and turn_audio_start_ms is not None:
+                    turn_audio_end_ms = json.loads(message).get("audio_end_ms")
+                    if turn_audio_end_ms is not None:
+                        live_emotion.submit_turn(turn_audio_start_ms / 1000, turn_audio_end_ms / 1000)
+                    turn_audio_start_ms = None
+
+            # Forward to client (ignore if disconnected), minus events it never reads
+            outgoing = downlink_filter.apply(event_type, message, event)
+            if outgoing is not None:
+                try:
+                    await client_ws.send_text(outgoing)
+                except (WebSocketDisconnect, RuntimeError):
+                    break
+
+            # Everything below acts on one of the decoded INSPECTED_EVENT_TYPES
+            if event is None:
+                continue
 
             # Listen for tool calls and handle them
             try:
-                if event.get("type") == "response.function_call_arguments.done":
-                    print(f"event: {json.dumps(event, indent=4)}")
-                    call_id = event.get("call_id")
-                    raw_args = event.get("arguments")
-                    args = json.loads(raw_args)
-                    item_title = args.get('title')
-                    item_description = args.get('description')
-                    item_status = args.get('status')
-                    item = models.ActionItem(
-                        user_id=user_id,
-                        title=item_title,
-                        description=item_description,
-                        status=item_status,
-                        created_at=datetime.now(),
-                    )
-                    print(f"Creating action item: {item_title} {item_description} {item_status}")
-                    db.add(item)
-                    db.commit()
-                    db.refresh(item)
+                if event_type == "response.function_call_arguments.done":
+                    with tracer.start_as_current_span("voice.tool_call", attributes={"tool.name": event.get("name", "")}):
+                        logger.debug("Tool call event", extra={"event": event})
+                        call_id = event.get("call_id")
+                        raw_args = event.get("arguments")
+                        args = json.loads(raw_args)
+                        item_title = args.get('title')
+                        item_description = args.get('description')
+                        item_status = args.get('status')
+                        logger.info("Creating action item", extra={"user_id": user_id, "conversation_id": conversation_id})
+                        # A connection is only checked out for the insert itself
+                        with metrics.TOOL_CALL_DB_SECONDS.labels("create_action_item").time():
+                            async with AsyncSessionLocal() as db:
+                                await create_action_item(db, user_id, item_title, item_description, item_status)
+                        await context_cache.invalidate(user_id)
         
-                    await openai_ws.send(json.dumps({
-                        "type": "conversation.item.create",
-                        "item": {
-                            "type": "function_call_output",
-                            "call_id": call_id,
-                            "output": json.dumps({"ok": True}) 
-                        }
-                    }))
-
-                    await openai_ws.send(json.dumps({
-                        "type": "response.create"
-                    }))
+                        await openai_ws.send(json.dumps({
+                            "type": "conversation.item.create",
+                            "item": {
+                                "type": "function_call_output",
+                                "call_id": call_id,
+                                "output": json.dumps({"ok": True}) 
+                            }
+                        }))
 
-            except Exception as e:
-                print(f"Error in tool call: {e}")
-                traceback.print_exc()
+                        await openai_ws.send(json.dumps({
+                            "type": "response.create"
+                        }))
+
+            except Exception:
+                logger.exception("Error in tool call")
             
             # Check user transcripts for policy violations and append to transcript if not flagged
-            if event.get("type") == "conversation.item.input_audio_transcription.completed":
+            if event_type == "conversation.item.input_audio_transcription.completed":
                 user_transcript = event.get("transcript", "")
                 if not user_transcript:
                     continue
                     
-                moderation_result = await check_content_moderation(user_transcript, user_id, db)
-                
-                if moderation_result["flagged"]:
-                    warning = {
-                        "type": "error",
-                        "error": {
-                            "message": "Session terminated: Content policy violation detected.",
-                            "code": "content_policy_violation"
-                        }
-                    }
-                    try:
-                        await client_ws.send_text(json.dumps(warning))
-                    except Exception:
-                        pass
-                    
-                    await client_ws.close(code=1008, reason="Content policy violation")
-                    await openai_ws.close()
-                    return
-                
-                user_message_buffer.append(user_transcript)
+                # Moderation runs beside the relay; violations end the session via on_flagged
+                key = next(moderation_keys)
+                moderation.submit(user_transcript, key)
+                user_message_buffer.append((key, user_transcript))
             
             
             # Save transcript when assistant completes response
-            if event.get("type") == "response.output_audio_transcript.done":
+            if event_type == "response.output_audio_transcript.done":
                 if user_message_buffer:
-                    transcript.append({"role": "user", "content": " ".join(user_message_buffer)})
+                    message = {"role": "user", "content": " ".join(text for _, text in user_message_buffer)}
+                    transcript.append(message)
+                    for key, _ in user_message_buffer:
+                        user_turn_of[key] = message
                     user_message_buffer.clear()
                 transcript.append({"role": "assistant", "content": event.get("transcript", "")})
+                downlink.flush_totals(*downlink_filter.totals())
+                if turn_span is not None:
+                    turn_span.end()
+                    turn_span = None
                 
 
 
     except websockets.exceptions.ConnectionClosed as e:
-        print(f"OpenAI relay - WS closed: code={e.code}, reason={e.reason}")
+        logger.info("OpenAI relay - WS closed: code=%s, reason=%s", e.code, e.reason)
+    except Exception:
+        logger.exception("Error in OpenAI relay")
+    finally:
+        # Turns still awaiting a verdict must be checked before close-out saves them
+        await moderation.drain(moderation_task)
+        downlink.flush_totals(*downlink_filter.totals())
+        if turn_span is not None:
+            turn_span.end()
+        stats = downlink_filter.summary()
+        metrics.observe_downlink(stats["by_type"])
+        logger.info(
+            "Downlink summary",
+            extra={"conversation_id": conversation_id, "bytes_in": stats["bytes_in"], "bytes_out": stats["bytes_out"], "bytes_saved": stats["bytes_saved"]},
+        )
+
+
+def build_session_update(instructions: str) -> dict:
+    """Build the session.update event carrying the prompt, audio config and tools."""
+    return {
+        "type": "session.update",
+        "session": {
+            "type": "realtime",
+            "instructions": instructions,
+            "audio": {
+                "input": {
+                    "transcription": {"model": "whisper-1"},
+                    "turn_detection": {
+                        "type": "server_vad",
+                        "threshold": 0.5,
+                    "prefix_padding_ms": 500,
+                    "silence_duration_ms": 1500,
+                    },
+                },
+                "output": {"voice": "cedar"},
+            },
+            "tools": [
+                {
+                    "type": "function",
+                    "name": "create_action_item",
+                    "description": "Create a new action item to be saved to the action_items table in the database.",
+                    "parameters": {
+                        "type": "object",
+                        "additionalProperties": False,
+                        "properties":{
+                            "title": {
+                                "type": "string",
+                                "description": "The title of the action item to be created."
+                            },
+                            "description": {
+                                "type": "string",
+                                "description": "A concise description of the action item to be created."
+                            },
+                            "status": {
+                                "type": "string",
+                                "description": "The status of the action item to be created.",
+                                "enum": ["open", "closed"],
+                                "default": "open"
+                            },
+                        },
+                        "required": ["title", "description", "status"]
+                    }
+                }
+            ],
+            "tool_choice": "auto",
+        },
+    }
+
+
+async def create_conversation_record(user_id: int) -> int:
+    """Insert the conversation row in its own session so it can run beside other bootstrap queries."""
+    async with AsyncSessionLocal() as db:
+        conversation = await create_conversation(db, user_id)
+        return conversation.id
+
+
+async def collect_emotion_audio(recorder: SessionAudioRecorder, conversation_id: int | None = None) -> tuple[bytes | None, list]:
+    """Copy the windows to analyze out of a finished session's recording.
+
+    Emotion analysis is optional, so a failure here is logged and treated
+    like a silent recording rather than costing the session its transcript.
+
+    Returns:
+        (concatenated PCM16 windows, [start second, byte length] per window);
+        (None, []) when the recording has no speech, e.g. a muted session
+    """
+    try:
+        windows = await asyncio.to_thread(extract_windows, recorder)
     except Exception as e:
-        print(f"Error in OpenAI relay: {e}")
-        traceback.print_exc()
+        logger.warning("Emotion window extraction failed for conversation %s: %s", conversation_id, e)
+        return None, []
+    if not windows:
+        return None, []
+    return b"".join(pcm for _, pcm in windows), [[start, len(pcm)] for start, pcm in windows]
+
+
+async def _discard_upstream(task: asyncio.Task):
+    """Cancel a pending upstream connect, closing the socket if it already opened."""
+    task.cancel()
+    try:
+        openai_ws = await task
+    except (asyncio.CancelledError, Exception):
+        return
+    await openai_ws.close()
 
 
 @router.websocket("/ws/voice")
@@ -214,6 +382,11 @@ async def voice_endpoint(websocket: WebSocket, token: str, onboarding: bool = Fa
     (profile summary or onboarding script), and saves encrypted transcript
     with embeddings on completion.
 
+    Session bootstrap runs as a small dependency graph: the upstream
+    handshake starts right after authentication and overlaps the user lookup
+    and context queries, while the conversation row is inserted in the
+    background. Per-phase timings are logged for every session.
+
     Args:
         websocket: WebSocket connection from the client
         token: JWT access token for authentication
@@ -225,218 +398,154 @@ async def voice_endpoint(websocket: WebSocket, token: str, onboarding: bool = Fa
     Raises:
         WebSocketDisconnect: When connection is closed by client
     """
+    # Every span of the session, including queued post-session work, hangs off this one
+    with tracer.start_as_current_span("voice.session", attributes={"voice.onboarding": onboarding}) as session_span:
+        await _run_voice_session(websocket, token, onboarding, session_span)
+
+
+async def _run_voice_session(websocket: WebSocket, token: str, onboarding: bool, session_span):
+    """Body of voice_endpoint, run inside the session's root span."""
+    loop = asyncio.get_running_loop()
+    bootstrap_started = loop.time()
+    timings = {}
+
+    async def timed(phase: str, awaitable):
+        started = loop.time()
+        try:
+            with tracer.start_as_current_span(f"voice.{phase}"):
+                return await awaitable
+        finally:
+            timings[phase] = round((loop.time() - started) * 1000, 1)
 
     # Must accept WebSocket before we can close it
-    await websocket.accept()
+    await timed("accept", websocket.accept())
 
     # Validate JWT token
     try:
-        payload = decode_access_token(token)
-        user_id = int(payload.get("sub"))
+        with tracer.start_as_current_span("voice.jwt_decode"):
+            payload = decode_access_token(token)
+            user_id = int(payload.get("sub"))
+        session_span.set_attribute("user.id", user_id)
     except Exception:
         await websocket.close(code=1008, reason="Invalid token")
         return
 
-    db = SessionLocal()
-    conversation = None
+    conversation_id = None
     transcript = []
     start_time = None
-    audio_chunks = []
-
-    try:
-        # Validate user exists
-        user = db.query(models.User).filter(models.User.id == user_id).first()
-        if not user:
-            await websocket.close(code=1008, reason="User not found")
-            return
-
-        # Create conversation record
-        conversation = models.Conversation(user_id=user_id)
-        db.add(conversation)
-        db.commit()
-        db.refresh(conversation)
-        start_time = asyncio.get_event_loop().time()
-        ninety_days_ago = datetime.now() - timedelta(days=90)
-
-        # Connect to OpenAI Realtime API
-        async with websockets.connect(
-            "wss://api.openai.com/v1/realtime?model=gpt-realtime",
-            subprotocols=["realtime"],
-            extra_headers={"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}"},
-        ) as openai_ws:
-
-            # Send session config + system prompt
-            if onboarding:
-                # Use onboarding script without user context
-                full_instructions = ONBOARDING_PROMPT
-            else:
-                # Use regular coaching prompt with user profile context and conversation history
-                conversation_history = (
-                    db.query(models.Conversation)
-                    .filter(
-                        models.Conversation.user_id == user_id,
-                        models.Conversation.created_at >= ninety_days_ago,
-                    )
-                    .order_by(models.Conversation.created_at.desc())
-                    .all()
-                )
-
-                # Put the conversation texts together into an f string with dates so the model can see the conversation history in chronological order
-                history_text = ""
-                for i, conv in enumerate(conversation_history):
-                    if conv.summary:
-                        date_str = conv.created_at.strftime("%Y-%m-%d")
-                        history_text += f"Session {i+1} ({date_str}): {conv.summary}\n"
-
-                # Inject the user profile and conversation history into the prompt for full context at conversation start
-                user_context = (
-                    f"USER PROFILE:\n{user.profile_summary}\n\n"
-                    if user.profile_summary
-                    else ""
-                )
-                history_context = (
-                    f"CONVERSATION HISTORY: (LAST 90 DAYS):\n{history_text}\n"
-                    if history_text
-                    else ""
-                )
-
-                # Add action items to the prompt if they exist and are still open
-                action_items = (
-                    db.query(models.ActionItem)
-                    .filter(
-                        models.ActionItem.user_id == user_id,
-                        models.ActionItem.status == 'open',
-                    )
-                    .all()
-                )
-
-                # Turn them into a string to inject into the prompt along with conversation history and user context
-                action_item_text = ""
-                for item in action_items:
-                    action_item_text += f"{item.title} | {item.status} | {item.description}\n"
-                
-                action_item_context = (
-                    f"ACTION ITEMS: \n{action_item_text}"
-                    if action_item_text
-                    else ""
-                )
-
-                full_instructions = SOCIAL_COACH_PROMPT + user_context + history_context + action_item_context
-
-            session_update = {
-                "type": "session.update",
-                "session": {
-                    "type": "realtime",
-                    "instructions": full_instructions,
-                    "audio": {
-                        "input": {
-                            "transcription": {"model": "whisper-1"},
-                            "turn_detection": {
-                                "type": "server_vad",
-                                "threshold": 0.5,
-                            "prefix_padding_ms": 500,
-                            "silence_duration_ms": 1500,
-                            },
-                        },
-                        "output": {"voice": "cedar"},
-                    },
-                    "tools": [
-                        {
-                            "type": "function",
-                            "name": "create_action_item",
-                            "description": "Create a new action item to be saved to the action_items table in the database.",
-                            "parameters": {
-                                "type": "object",
-                                "additionalProperties": False,
-                                "properties":{
-                                    "title": {
-                                        "type": "string",
-                                        "description": "The title of the action item to be created."
-                                    },
-                                    "description": {
-                                        "type": "string",
-                                        "description": "A concise description of the action item to be created."
-                                    },
-                                    "status": {
-                                        "type": "string",
-                                        "description": "The status of the action item to be created.",
-                                        "enum": ["open", "closed"],
-                                        "default": "open"
-                                    },
-                                },
-                                "required": ["title", "description", "status"]
-                            }
-                        }
-                    ],
-                    "tool_choice": "auto",
-                },
-            }
+    recorder = SessionAudioRecorder()
 
-            await openai_ws.send(json.dumps(session_update))
+    # Check out a warm upstream connection, or start the handshake, while we hit the database
+    upstream_task = asyncio.create_task(timed("upstream_connect", realtime_pool.acquire()))
+    conversation_task = None
+    openai_ws = None
+    live_emotion = None
+    relaying = False
 
-            # Start a bidirectional relay
-            await asyncio.gather(
-                relay_client_to_openai(websocket, openai_ws, audio_chunks),
-                relay_openai_to_client(openai_ws, websocket, transcript, user_id, db, conversation.id),
-            )
+    try:
+        # Database work is done in short units, so a session that relays for
+        # half an hour never keeps a pooled connection checked out
+        async with AsyncSessionLocal() as db:
+            # Validate user exists
+            user = await timed("user_lookup", get_user(db, user_id))
+            if not user:
+                await websocket.close(code=1008, reason="User not found")
+                return
+
+        # Create conversation record in the background
+        conversation_task = asyncio.create_task(timed("conversation_insert", create_conversation_record(user_id)))
+
+        # Send session config + system prompt
+        if onboarding:
+            # Use onboarding script without user context
+            full_instructions = ONBOARDING_PROMPT
+        else:
+            # Use regular coaching prompt with user profile context and conversation history;
+            # the context opens its own short sessions around the slow profile embedding call
+            full_instructions = SOCIAL_COACH_PROMPT + await timed("context", get_user_context(user))
+
+        openai_ws = await upstream_task
+        await timed("session_update", openai_ws.send(json.dumps(build_session_update(full_instructions))))
+        conversation_id = await conversation_task
+        session_span.set_attribute("conversation.id", conversation_id)
+        if LIVE_EMOTION_ANALYSIS:
+            live_emotion = LiveEmotionAnalyzer(conversation_id, recorder)
+
+        start_time = loop.time()
+        timings["total"] = round((start_time - bootstrap_started) * 1000, 1)
+        logger.info("Session bootstrap", extra={"conversation_id": conversation_id, "timings_ms": timings})
+        metrics.observe_session_start(timings)
+        metrics.ACTIVE_SESSIONS.inc()
+        relaying = True
+
+        # Start a bidirectional relay
+        await asyncio.gather(
+            relay_client_to_openai(websocket, openai_ws, recorder),
+            relay_openai_to_client(openai_ws, websocket, transcript, user_id, conversation_id, live_emotion),
+        )
 
     except WebSocketDisconnect:
         pass
-    except Exception as e:
-        print(f"Error in voice endpoint: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error in voice endpoint")
 
     finally:
-        if conversation and transcript:
-            try:
-                # Calculate duration
-                duration = int(asyncio.get_event_loop().time() - start_time) if start_time else 0
-                
-                # Generate title from first user message
-                first_user_msg = next((m["content"] for m in transcript if m["role"] == "user"), None)
-                title = first_user_msg[:MAX_TITLE_LENGTH] if first_user_msg else "Untitled conversation"
-
-                # Set conversation metadata
-                conversation.duration = duration
-                conversation.title = title
-
-                # Save messages
-                for msg in transcript:
-                    message = models.Message(
-                        conversation_id=conversation.id,
-                        role=msg["role"],
-                        content=encrypt_data(msg["content"]),
-                    )
-                    db.add(message)
-
-                # Generate embedding and summary
-                conversation.embedding = generate_conversation_embedding(transcript)
-                conversation.summary = generate_conversation_summary(transcript)
-                db.commit()
-            except Exception as e:
-                print(f"Failed to save conversation: {e}")
-                traceback.print_exc()
-                db.rollback()
-        
-        # Optional: emotion analysis (doesn't block if it fails)
-        if audio_chunks and conversation:
-            temp_path = None
+        if relaying:
+            metrics.ACTIVE_SESSIONS.dec()
+        if openai_ws is not None:
+            await openai_ws.close()
+        else:
+            await _discard_upstream(upstream_task)
+        if conversation_id is None and conversation_task is not None:
+            # The insert is short; let it land so anything recorded can still be saved
             try:
-                print(f"Audio chunks count: {len(audio_chunks)}")
-                print(f"First chunk length: {len(audio_chunks[0]) if audio_chunks else 'N/A'}")
-                wav_bytes = combine_and_convert_audio(audio_chunks)
-                print(f"WAV bytes length: {len(wav_bytes) if wav_bytes else 'None'}")
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-                    temp_file.write(wav_bytes)
-                    temp_path = temp_file.name
-
-                emotion_data = await analyze_emotion_with_hume(wav_bytes)
-                conversation.emotion_data = emotion_data
-                db.commit()
+                conversation_id = await conversation_task
             except Exception as e:
-                print(f"Emotion analysis failed (non-critical): {e}")
-            finally:
-                if temp_path and os.path.exists(temp_path):
-                    os.unlink(temp_path)
-
-        db.close()
+                logger.warning("Failed to create conversation: %s", e)
+        # Turns analyzed live are already stored; the emotion stage only aggregates them
+        live_turns = await live_emotion.drain() if live_emotion is not None else 0
+
+        # Persist the transcript and hand the slow work (embedding, summary,
+        # emotion analysis) to the post-session workers
+        if conversation_id and (transcript or recorder.bytes_written):
+            with tracer.start_as_current_span("voice.close_out"):
+                try:
+                    stages = []
+                    # Optional: emotion analysis on voiced windows sampled across the session
+                    audio = None
+                    audio_windows = []
+                    if live_turns:
+                        stages.append("emotion")
+                    elif recorder.bytes_written:
+                        logger.debug("Recorded audio", extra={"conversation_id": conversation_id, "seconds": recorder.duration, "spilled": recorder.spilled})
+                        audio, audio_windows = await collect_emotion_audio(recorder, conversation_id)
+                        if audio_windows:
+                            stages.append("emotion")
+
+                    if transcript:
+                        # Calculate duration
+                        duration = int(loop.time() - start_time) if start_time else 0
+
+                        # Generate title from first user message
+                        first_user_msg = next((m["content"] for m in transcript if m["role"] == "user"), None)
+                        title = first_user_msg[:MAX_TITLE_LENGTH] if first_user_msg else "Untitled conversation"
+
+                        # Encrypt off the event loop before checking out a connection
+                        with tracer.start_as_current_span("voice.encrypt_transcript", attributes={"messages": len(transcript)}):
+                            encrypted = await asyncio.to_thread(encrypt_many, [msg["content"] for msg in transcript])
+                        messages = [{"role": msg["role"], "content": content} for msg, content in zip(transcript, encrypted)]
+                        stages = ["embedding", "summary", "digest"] + stages
+
+                    # One short unit of work: messages, metadata and the job commit together
+                    async with AsyncSessionLocal() as db:
+                        if transcript:
+                            with tracer.start_as_current_span("voice.save_transcript"):
+                                await save_transcript(db, conversation_id, duration, title, messages)
+                        enqueue_post_session_job(db, conversation_id, stages, audio, audio_windows)
+                        await db.commit()
+                    worker_pool.notify()
+                except Exception:
+                    # Leaving the session block rolled back anything uncommitted
+                    logger.exception("Failed to save conversation")
+
+        recorder.close()
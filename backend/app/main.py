@@ -1,14 +1,44 @@
-from fastapi import FastAPI
-from app.database import Base, engine
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from app.database import Base, engine, async_engine
 from app import models
 from app.api import auth, voice, conversations, analytics
+from app.services.post_session import worker_pool
+from app.services.realtime_pool import realtime_pool
+from app.services.hume_service import hume_pool
+from app.services import metrics
+from app.services.tracing import configure_tracing, shutdown_tracing
+from app.services.structured_logging import configure_logging, shutdown_logging
 from fastapi.middleware.cors import CORSMiddleware
 
 
 
+# Logs go through a background queue; see structured_logging for LOG_* settings
+configure_logging()
+
 models.Base.metadata.create_all(bind=engine)
+metrics.instrument_pool("sync", engine)
+metrics.instrument_pool("async", async_engine.sync_engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Span export is opt-in via TRACING_EXPORTER
+    configure_tracing()
+    # Post-session processing (embedding, summary, emotion) runs in the background
+    worker_pool.start()
+    # Optional warm pool of upstream Realtime connections (REALTIME_POOL_ENABLED)
+    realtime_pool.start()
+    yield
+    await realtime_pool.stop()
+    await worker_pool.stop()
+    await hume_pool.close()
+    shutdown_tracing()
+    shutdown_logging()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS for React frontend - MUST come before routers
 import os
@@ -28,6 +58,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so path parameters don't explode cardinality
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_SECONDS.labels(
+            request.method, route.path if route else "unmatched", str(status)
+        ).observe(time.perf_counter() - started)
+
+
 app.include_router(conversations.router)
 app.include_router(voice.router)
 app.include_router(auth.router)  
@@ -38,4 +84,10 @@ def root():
     return {"message": "Pono API"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = metrics.render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Text, LargeBinary, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -47,4 +47,41 @@ class ActionItem(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     closed_at = Column(DateTime, nullable=True)
     description = Column(Text, nullable=True)
-    status = Column(String, default="open")
\ No newline at end of file
+    status = Column(String, default="open")
+
+class PostSessionJob(Base):
+    __tablename__ = "post_session_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), unique=True) # NULL for user-level jobs
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True) # Set for user-level jobs (memory digest rebuilds)
+    status = Column(String, default="pending", index=True) # pending, running, done, failed
+    attempts = Column(Integer, default=0)
+    run_after = Column(DateTime, default=datetime.utcnow)
+    locked_until = Column(DateTime, nullable=True) # Lease for the worker currently running the job
+    last_error = Column(Text, nullable=True)
+    payload = Column(JSONB, nullable=True) # {"stages": [...], "audio_windows": [[start, length], ...], "trace": {...}}
+    audio = Column(LargeBinary, nullable=True) # PCM16 windows for emotion analysis, cleared when done
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class MemoryDigest(Base):
+    __tablename__ = "memory_digests"
+    __table_args__ = (UniqueConstraint("user_id", "version"),)
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    version = Column(Integer) # Increments with every update; latest row is the current digest
+    format_version = Column(Integer) # DIGEST_FORMAT_VERSION the digest was built with
+    content = Column(Text)
+    conversation_ids = Column(JSONB) # Latest MEMORY_DIGEST_TRACKED_IDS conversations folded into this digest
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class TurnEmotion(Base):
+    __tablename__ = "turn_emotions"
+    id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), index=True)
+    turn_index = Column(Integer)
+    start_seconds = Column(Float) # Turn boundaries within the session audio
+    end_seconds = Column(Float)
+    emotions = Column(JSONB) # Mean tracked-emotion scores for the turn
+    predictions = Column(JSONB) # Raw per-prediction scores, aggregated into emotion_data after the session
+    created_at = Column(DateTime, default=datetime.utcnow)
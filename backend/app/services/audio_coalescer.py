@@ -0,0 +1,76 @@
+import asyncio
+import base64
+import json
+import os
+
+# OpenAI Realtime input audio format: 24 kHz mono PCM16
+SAMPLE_RATE = 24000
+BYTES_PER_SAMPLE = 2
+
+# Target size of each upstream append event, in milliseconds of audio (0 disables coalescing)
+UPLINK_COALESCE_MS = int(os.getenv("UPLINK_COALESCE_MS", "40"))
+
+
+def wrap_audio_append(pcm: bytes) -> str:
+    """Wrap raw PCM16 audio in an input_audio_buffer.append event for OpenAI."""
+    return json.dumps({
+        "type": "input_audio_buffer.append",
+        "audio": base64.b64encode(pcm).decode(),
+    })
+
+
+class AudioCoalescer:
+    """Merge small uplink PCM16 chunks into larger append events.
+
+    The browser worklet produces 128-sample buffers (~5 ms), so forwarding
+    them one by one means hundreds of tiny upstream messages per second.
+    Audio is buffered until `frame_ms` worth has accumulated, the oldest
+    buffered byte is `frame_ms` old (see `run_timer`), or a non-audio event
+    has to go out. All upstream sends go through here so ordering between
+    audio and control events is preserved.
+    """
+
+    def __init__(self, send, frame_ms: int = UPLINK_COALESCE_MS):
+        self._send = send
+        self.frame_bytes = SAMPLE_RATE * BYTES_PER_SAMPLE * frame_ms // 1000
+        self.max_delay = frame_ms / 1000
+        self._buffer = bytearray()
+        self._first_at = None
+        self._lock = asyncio.Lock()
+
+    async def append(self, pcm: bytes):
+        """Buffer a PCM16 chunk, flushing once a full frame is available."""
+        if not self._buffer:
+            self._first_at = asyncio.get_running_loop().time()
+        self._buffer += pcm
+        if len(self._buffer) >= self.frame_bytes:
+            await self.flush()
+
+    async def send_event(self, data: str):
+        """Flush buffered audio, then forward a non-audio event as-is."""
+        async with self._lock:
+            await self._flush_locked()
+            await self._send(data)
+
+    async def flush(self):
+        """Send any buffered audio as a single append event."""
+        async with self._lock:
+            await self._flush_locked()
+
+    async def _flush_locked(self):
+        if not self._buffer:
+            return
+        pcm = bytes(self._buffer)
+        self._buffer.clear()
+        self._first_at = None
+        await self._send(wrap_audio_append(pcm))
+
+    async def run_timer(self):
+        """Flush partially filled frames so trailing audio is never held back."""
+        if self.max_delay <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.max_delay / 2)
+            if self._first_at is not None and loop.time() - self._first_at >= self.max_delay:
+                await self.flush()
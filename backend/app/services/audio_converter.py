@@ -2,24 +2,34 @@ import base64
 import wave
 import io
 
-def combine_and_convert_audio(base64_chunks: list[str]) -> bytes:
+def combine_and_convert_audio(base64_chunks: list[str | bytes]) -> bytes:
     """
-    Convert list of base64 pcm16 chunks to wav format for Hume
+    Convert list of pcm16 chunks to wav format for Hume
+
+    Chunks may be base64 strings or raw bytes (already decoded by the relay).
     """
 
     # Convert base64 chunks to bytes
-    audio_chunks = [base64.b64decode(chunk) for chunk in base64_chunks]
+    audio_chunks = [
+        chunk if isinstance(chunk, bytes) else base64.b64decode(chunk)
+        for chunk in base64_chunks
+    ]
 
     # Combine chunks into bytes
     pcm_data = b''.join(audio_chunks)
 
-    # Convert to wav file
+    return pcm16_to_wav(pcm_data)
+
+
+def pcm16_to_wav(pcm_data: bytes | memoryview, sample_rate: int = 24000) -> bytes:
+    """
+    Wrap raw mono pcm16 audio (24 kHz unless resampled) in a wav container for Hume
+    """
     buffer = io.BytesIO()
     with wave.open(buffer, 'wb') as wav_file:
         wav_file.setnchannels(1)
-        wav_file.setframerate(24000)
+        wav_file.setframerate(sample_rate)
         wav_file.setsampwidth(2)
         wav_file.writeframes(pcm_data)
-    
 
     return buffer.getvalue()
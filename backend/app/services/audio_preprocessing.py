@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+
+from app.services.audio_coalescer import SAMPLE_RATE
+from app.services.audio_converter import pcm16_to_wav
+
+# Energy-based voice activity detection; off means windows are cut blind
+AUDIO_VAD_ENABLED = os.getenv("AUDIO_VAD_ENABLED", "true").lower() == "true"
+AUDIO_VAD_FRAME_MS = int(os.getenv("AUDIO_VAD_FRAME_MS", "30"))
+# A frame is voiced if it is this many dB above the recording's noise floor...
+AUDIO_VAD_MARGIN_DB = float(os.getenv("AUDIO_VAD_MARGIN_DB", "12"))
+# ...and louder than this absolute level
+AUDIO_VAD_MIN_DBFS = float(os.getenv("AUDIO_VAD_MIN_DBFS", "-50"))
+# Pauses shorter than this stay inside a segment; longer ones split it
+AUDIO_VAD_MIN_SILENCE_MS = int(os.getenv("AUDIO_VAD_MIN_SILENCE_MS", "400"))
+# Voiced runs shorter than this (clicks, bumps) are dropped
+AUDIO_VAD_MIN_SPEECH_MS = int(os.getenv("AUDIO_VAD_MIN_SPEECH_MS", "250"))
+# Kept around each segment so word onsets and endings are not clipped
+AUDIO_VAD_PAD_MS = int(os.getenv("AUDIO_VAD_PAD_MS", "100"))
+
+# RMS level clips are normalized to before analysis, with a cap on the gain
+AUDIO_TARGET_DBFS = float(os.getenv("AUDIO_TARGET_DBFS", "-20"))
+AUDIO_MAX_GAIN_DB = float(os.getenv("AUDIO_MAX_GAIN_DB", "20"))
+# Rate of the clips sent to Hume (24000 sends the recording's own rate)
+HUME_SAMPLE_RATE = int(os.getenv("HUME_SAMPLE_RATE", str(SAMPLE_RATE)))
+
+# Frames converted to float per step, so long recordings never get a full float copy
+_LEVEL_BLOCK_FRAMES = 2000
+_SILENCE_DB = -100.0
+
+
+def frame_levels(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    """RMS level in dBFS of each whole frame of PCM16 samples."""
+    frames = len(samples) // frame_len
+    levels = np.empty(frames, dtype=np.float32)
+    for first in range(0, frames, _LEVEL_BLOCK_FRAMES):
+        last = min(first + _LEVEL_BLOCK_FRAMES, frames)
+        block = samples[first * frame_len:last * frame_len].astype(np.float32).reshape(-1, frame_len)
+        power = np.einsum("ij,ij->i", block, block) / (frame_len * 32768.0 ** 2)
+        levels[first:last] = 10 * np.log10(np.maximum(power, 10 ** (_SILENCE_DB / 10)))
+    return levels
+
+
+def _runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) indices of each run of True in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def voiced_segments(pcm: bytes | memoryview, sample_rate: int = SAMPLE_RATE) -> list[tuple[float, float]]:
+    """Find the stretches of a PCM16 recording that contain speech.
+
+    Frames louder than both the noise floor (10th percentile frame level)
+    plus AUDIO_VAD_MARGIN_DB and AUDIO_VAD_MIN_DBFS count as voiced. Voiced
+    runs separated by less than AUDIO_VAD_MIN_SILENCE_MS are merged, runs
+    shorter than AUDIO_VAD_MIN_SPEECH_MS are dropped, and the rest are padded
+    by AUDIO_VAD_PAD_MS.
+
+    Args:
+        pcm: Mono PCM16 audio (not copied)
+        sample_rate: Samples per second of `pcm`
+
+    Returns:
+        (start second, end second) of each segment, relative to `pcm`
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    frame_len = sample_rate * AUDIO_VAD_FRAME_MS // 1000
+    levels = frame_levels(samples, frame_len)
+    if not len(levels):
+        return []
+
+    threshold = max(float(np.percentile(levels, 10)) + AUDIO_VAD_MARGIN_DB, AUDIO_VAD_MIN_DBFS)
+    starts, ends = _runs(levels > threshold)
+    if not len(starts):
+        return []
+
+    # Bridge short pauses: a run continues the previous one if the gap is small
+    min_gap = AUDIO_VAD_MIN_SILENCE_MS / AUDIO_VAD_FRAME_MS
+    split = np.concatenate(([True], starts[1:] - ends[:-1] >= min_gap))
+    starts = starts[split]
+    ends = ends[np.concatenate((split[1:], [True]))]
+
+    keep = ends - starts >= AUDIO_VAD_MIN_SPEECH_MS / AUDIO_VAD_FRAME_MS
+    frame_seconds = frame_len / sample_rate
+    pad = AUDIO_VAD_PAD_MS / 1000
+    total = len(samples) / sample_rate
+    return [
+        (round(max(float(start) * frame_seconds - pad, 0.0), 3), round(min(float(end) * frame_seconds + pad, total), 3))
+        for start, end in zip(starts[keep], ends[keep])
+    ]
+
+
+def split_segments(segments: list[tuple[float, float]], max_seconds: float) -> list[tuple[float, float]]:
+    """Cut segments into pieces of at most max_seconds, dropping slivers under the minimum speech length."""
+    min_seconds = AUDIO_VAD_MIN_SPEECH_MS / 1000
+    pieces = []
+    for start, end in segments:
+        while end - start > min_seconds:
+            pieces.append((start, round(min(start + max_seconds, end), 3)))
+            start = round(start + max_seconds, 3)
+    return pieces
+
+
+def normalize_loudness(samples: np.ndarray) -> np.ndarray:
+    """Scale float samples (-1..1) to AUDIO_TARGET_DBFS RMS without clipping or boosting noise past AUDIO_MAX_GAIN_DB."""
+    rms = float(np.sqrt(np.mean(np.square(samples)))) if len(samples) else 0.0
+    peak = float(np.max(np.abs(samples))) if len(samples) else 0.0
+    if rms <= 0 or peak <= 0:
+        return samples
+    gain = min(10 ** ((AUDIO_TARGET_DBFS - 20 * np.log10(rms)) / 20), 10 ** (AUDIO_MAX_GAIN_DB / 20), 0.99 / peak)
+    return samples * np.float32(gain)
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Linear-interpolation resample; enough for prosody, which lives well below 4 kHz."""
+    if source_rate == target_rate or not len(samples):
+        return samples
+    count = int(round(len(samples) * target_rate / source_rate))
+    positions = np.arange(count, dtype=np.float64) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def prepare_clip(pcm: bytes | memoryview, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Turn a PCM16 window into the WAV sent to Hume: loudness-normalized, resampled to HUME_SAMPLE_RATE."""
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    samples = resample(normalize_loudness(samples), sample_rate, HUME_SAMPLE_RATE)
+    out = np.clip(np.round(samples * 32768.0), -32768, 32767).astype(np.int16)
+    return pcm16_to_wav(out.tobytes(), HUME_SAMPLE_RATE)
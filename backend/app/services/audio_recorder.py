@@ -0,0 +1,140 @@
+import mmap
+import os
+import tempfile
+
+from app.services.audio_coalescer import SAMPLE_RATE, BYTES_PER_SAMPLE
+
+BYTES_PER_SECOND = SAMPLE_RATE * BYTES_PER_SAMPLE
+
+# "spill": keep the whole session, moving to a temp file once memory is full
+# "ring": keep only the most recent AUDIO_RECORDER_MEMORY_SECONDS in memory
+AUDIO_RECORDER_MODE = os.getenv("AUDIO_RECORDER_MODE", "spill")
+AUDIO_RECORDER_MEMORY_SECONDS = int(os.getenv("AUDIO_RECORDER_MEMORY_SECONDS", "30"))
+
+
+class SessionAudioRecorder:
+    """Bounded store for a session's uplink PCM16 audio.
+
+    Chunks are written as raw bytes as they arrive, into a preallocated
+    buffer of fixed size. In "spill" mode the recording moves to a temp file
+    once the buffer is full and windows are served from a memory map; in
+    "ring" mode the oldest audio is overwritten instead. Either way memory
+    use per session is capped, and `window` returns views into the stored
+    audio without copying it.
+    """
+
+    def __init__(self, mode: str = AUDIO_RECORDER_MODE, memory_seconds: int = AUDIO_RECORDER_MEMORY_SECONDS):
+        if mode not in ("spill", "ring"):
+            raise ValueError(f"Unknown audio recorder mode: {mode}")
+        if memory_seconds <= 0:
+            raise ValueError("Audio recorder memory must be at least one second")
+        self.mode = mode
+        self.capacity = memory_seconds * BYTES_PER_SECOND
+        self.bytes_written = 0
+        self._buffer = bytearray(self.capacity)
+        self._file = None
+        self._mmap = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio recorded so far."""
+        return self.bytes_written / BYTES_PER_SECOND
+
+    @property
+    def retained_from(self) -> float:
+        """Earliest second of the session still held (later than 0 only in ring mode)."""
+        if self.mode == "ring":
+            return max(self.bytes_written - self.capacity, 0) / BYTES_PER_SECOND
+        return 0.0
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    def write(self, pcm: bytes):
+        """Append a chunk of raw PCM16 audio."""
+        if not pcm:
+            return
+        if self._file is not None:
+            self._file.write(pcm)
+        elif self.mode == "ring":
+            self._write_ring(pcm)
+        elif self.bytes_written + len(pcm) > self.capacity:
+            self._spill()
+            self._file.write(pcm)
+        else:
+            self._buffer[self.bytes_written:self.bytes_written + len(pcm)] = pcm
+        self.bytes_written += len(pcm)
+
+    def _write_ring(self, pcm: bytes):
+        # Only the last `capacity` bytes of an oversized chunk can survive
+        if len(pcm) > self.capacity:
+            offset = (self.bytes_written + len(pcm) - self.capacity) % self.capacity
+            pcm = pcm[-self.capacity:]
+        else:
+            offset = self.bytes_written % self.capacity
+        first = min(len(pcm), self.capacity - offset)
+        self._buffer[offset:offset + first] = pcm[:first]
+        self._buffer[:len(pcm) - first] = pcm[first:]
+
+    def _spill(self):
+        self._file = tempfile.TemporaryFile(suffix=".pcm")
+        self._file.write(memoryview(self._buffer)[:self.bytes_written])
+        # Views handed out earlier keep the old buffer alive until released
+        self._buffer = None
+
+    def window(self, start_seconds: float = 0, duration_seconds: float | None = None) -> memoryview | bytes:
+        """Return a view of the audio between two points in the session.
+
+        Args:
+            start_seconds: Offset from the start of the session
+            duration_seconds: Window length; None means until the end
+
+        Returns:
+            Zero-copy memoryview of the window, clipped to the audio still
+            held. A ring window that wraps around the buffer end is returned
+            as a bytes copy.
+        """
+        start = int(start_seconds * BYTES_PER_SECOND) // BYTES_PER_SAMPLE * BYTES_PER_SAMPLE
+        end = self.bytes_written
+        if duration_seconds is not None:
+            end = min(end, start + int(duration_seconds * BYTES_PER_SECOND) // BYTES_PER_SAMPLE * BYTES_PER_SAMPLE)
+
+        if self.mode == "ring":
+            start = max(start, self.bytes_written - self.capacity)
+            if start >= end:
+                return memoryview(b"")
+            head, tail = start % self.capacity, end % self.capacity or self.capacity
+            if head < tail:
+                return memoryview(self._buffer)[head:tail]
+            return bytes(self._buffer[head:]) + bytes(self._buffer[:tail])
+
+        if start >= end:
+            return memoryview(b"")
+        if self._file is None:
+            return memoryview(self._buffer)[start:end]
+
+        # Remap when the file has grown past the current map
+        if self._mmap is None or len(self._mmap) < end:
+            self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), self.bytes_written, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)[start:end]
+
+    def close(self):
+        """Release the temp file and buffers."""
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # A caller still holds a view; the map is freed with it
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
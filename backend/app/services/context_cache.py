@@ -0,0 +1,151 @@
+import itertools
+import logging
+import os
+import time
+from collections import OrderedDict
+
+CONTEXT_CACHE_SIZE = int(os.getenv("CONTEXT_CACHE_SIZE", "1024"))
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "3600"))
+# Optional shared backend (e.g. redis://host:6379/0) so invalidations reach every worker
+CONTEXT_CACHE_URL = os.getenv("CONTEXT_CACHE_URL")
+
+logger = logging.getLogger(__name__)
+
+# Store a value only if the key's generation is still the one read before building it
+_SET_IF_GENERATION = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[2] then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+class LocalContextCache:
+    """In-process LRU cache with a TTL, one per worker.
+
+    Every delete gives the key a new generation from a worker-wide counter.
+    Generations are kept for the `size` most recently deleted keys; any
+    other key reports the highest generation evicted so far, so a key
+    never appears to go back to an earlier generation.
+    """
+
+    def __init__(self, size: int = CONTEXT_CACHE_SIZE, ttl: int = CONTEXT_CACHE_TTL_SECONDS):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generations = OrderedDict()
+        self._counter = itertools.count(1)
+        self._evicted_generation = 0
+
+    async def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def generation(self, key: str) -> int:
+        return self._generations.get(key, self._evicted_generation)
+
+    async def set(self, key: str, value: str, generation: int | None = None) -> bool:
+        if generation is not None and await self.generation(key) != generation:
+            return False
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        return True
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+        self._generations[key] = next(self._counter)
+        self._generations.move_to_end(key)
+        while len(self._generations) > self.size:
+            _, evicted = self._generations.popitem(last=False)
+            self._evicted_generation = max(self._evicted_generation, evicted)
+
+
+class RedisContextCache:
+    """Shared cache backed by Redis (requires the optional `redis` package)."""
+
+    def __init__(self, url: str, ttl: int = CONTEXT_CACHE_TTL_SECONDS):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CONTEXT_CACHE_URL is set but the redis package is not installed")
+        self.ttl = ttl
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> str | None:
+        return await self._redis.get(key)
+
+    async def generation(self, key: str) -> int:
+        return int(await self._redis.get(f"{key}:generation") or 0)
+
+    async def set(self, key: str, value: str, generation: int | None = None) -> bool:
+        if generation is None:
+            await self._redis.set(key, value, ex=self.ttl)
+            return True
+        return bool(await self._redis.eval(_SET_IF_GENERATION, 2, key, f"{key}:generation", value, generation, self.ttl))
+
+    async def delete(self, key: str):
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.incr(f"{key}:generation")
+            pipe.expire(f"{key}:generation", self.ttl)
+            await pipe.execute()
+
+
+class UserContextCache:
+    """Cache of each user's assembled session context block.
+
+    Entries must be invalidated whenever their inputs change: a conversation
+    summary is stored, an action item is created or deleted, or onboarding
+    completes. Invalidating also bumps the user's generation; read it with
+    `generation` before building a context and pass it to `set`, so a
+    context built from data invalidated meanwhile is never stored. Backend
+    errors are treated as cache misses.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"pono:context:{user_id}"
+
+    async def get(self, user_id: int) -> str | None:
+        try:
+            return await self.backend.get(self._key(user_id))
+        except Exception as e:
+            logger.warning("Context cache get failed for user %s: %s", user_id, e)
+            return None
+
+    async def generation(self, user_id: int) -> int | None:
+        try:
+            return await self.backend.generation(self._key(user_id))
+        except Exception as e:
+            logger.warning("Context cache generation failed for user %s: %s", user_id, e)
+            return None
+
+    async def set(self, user_id: int, context: str, generation: int | None = None):
+        try:
+            await self.backend.set(self._key(user_id), context, generation)
+        except Exception as e:
+            logger.warning("Context cache set failed for user %s: %s", user_id, e)
+
+    async def invalidate(self, user_id: int):
+        try:
+            await self.backend.delete(self._key(user_id))
+        except Exception as e:
+            logger.warning("Context cache invalidate failed for user %s: %s", user_id, e)
+
+
+context_cache = UserContextCache(
+    RedisContextCache(CONTEXT_CACHE_URL) if CONTEXT_CACHE_URL else LocalContextCache()
+)
@@ -1,30 +1,130 @@
-import models
-from embedding_service import generate_query_embedding
-from sqlalchemy.orm import Session, Depends
-from database import get_db
-from dotenv import load_dotenv
+import hashlib
+import logging
+import math
+import os
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
-load_dotenv()
-def retrieve_context(user_id: int, db: Session = Depends(get_db)) -> str:
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.services.embedding_service import generate_query_embedding
+
+# Max tokens of conversation history injected into the session prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+# How far back summaries are considered
+CONTEXT_HISTORY_DAYS = int(os.getenv("CONTEXT_HISTORY_DAYS", "90"))
+# Recency score halves every N days
+CONTEXT_RECENCY_HALF_LIFE_DAYS = float(os.getenv("CONTEXT_RECENCY_HALF_LIFE_DAYS", "14"))
+# Share of the score from similarity to the profile (the rest is recency)
+CONTEXT_RELEVANCE_WEIGHT = float(os.getenv("CONTEXT_RELEVANCE_WEIGHT", "0.6"))
+
+# Relevance given to sessions that have no embedding to compare
+NEUTRAL_RELEVANCE = 0.5
+
+# Rough tokens-per-character ratio for English text
+CHARS_PER_TOKEN = 4
+
+# sha256(profile summary) -> embedding, so a profile is embedded once per worker
+_profile_embeddings = OrderedDict()
+PROFILE_EMBEDDING_CACHE_SIZE = 1024
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate, good enough for budgeting prompt sections."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+async def profile_embedding(profile_summary: str) -> list[float] | None:
+    """Embed the profile summary as the retrieval query, failing soft to recency-only.
+
+    A cache miss calls the OpenAI API, so await this without a database
+    connection checked out.
+    """
+    key = hashlib.sha256(profile_summary.encode()).hexdigest()
+    if key in _profile_embeddings:
+        _profile_embeddings.move_to_end(key)
+        return _profile_embeddings[key]
+    try:
+        embedding = await generate_query_embedding(profile_summary)
+    except Exception as e:
+        logger.warning("Profile embedding failed, using recency only: %s", e)
+        return None
+    _profile_embeddings[key] = embedding
+    while len(_profile_embeddings) > PROFILE_EMBEDDING_CACHE_SIZE:
+        _profile_embeddings.popitem(last=False)
+    return embedding
+
+
+def format_session(created_at: datetime, summary: str) -> str:
+    return f"Session ({created_at.strftime('%Y-%m-%d')}): {summary}\n"
+
+
+async def retrieve_context(
+    db: AsyncSession, user: models.User, query_embedding: list[float] | None = None, token_budget: int = CONTEXT_TOKEN_BUDGET
+) -> str:
     """
     Retrieve relevant past conversations and format as context string
-    
+
+    Candidates are the user's summarized conversations from the last
+    CONTEXT_HISTORY_DAYS. Each is scored by cosine similarity between its
+    stored embedding and the profile summary's (NEUTRAL_RELEVANCE if it has
+    none), blended with an exponential recency decay. The highest scoring summaries that fit in the token budget
+    are returned oldest first. Ties break on conversation ID, so the same
+    inputs always produce the same block.
+
     Args:
-        user_id: The user's ID
-        db: Database session
-    
+        db: Async database session
+        user: The user
+        query_embedding: The profile summary embedded by `profile_embedding`;
+            None ranks by recency only
+        token_budget: Max estimated tokens for the returned block
+
     Returns:
-        Formatted context string to inject into prompt
+        Formatted context string to inject into prompt ("" if no history)
     """
-    # Get user's profile summary as the query 
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    now = datetime.utcnow()
+
+    columns = [models.Conversation.id, models.Conversation.created_at, models.Conversation.summary]
+    if query_embedding is not None:
+        columns.append(models.Conversation.embedding.cosine_distance(query_embedding).label("distance"))
+    result = await db.execute(
+        select(*columns).where(
+            models.Conversation.user_id == user.id,
+            models.Conversation.created_at >= now - timedelta(days=CONTEXT_HISTORY_DAYS),
+            models.Conversation.summary.isnot(None),
+        )
+    )
+
+    scored = []
+    for row in result.all():
+        age_days = max((now - row.created_at).total_seconds() / 86400, 0)
+        recency = 0.5 ** (age_days / CONTEXT_RECENCY_HALF_LIFE_DAYS)
+        if query_embedding is None:
+            score = recency
+        else:
+            # Sessions without an embedding (e.g. the embedding stage failed)
+            # get a neutral relevance, so they are scored on the same scale
+            relevance = NEUTRAL_RELEVANCE if row.distance is None else 1 - row.distance / 2  # cosine distance 0..2 -> 1..0
+            score = CONTEXT_RELEVANCE_WEIGHT * relevance + (1 - CONTEXT_RELEVANCE_WEIGHT) * recency
+        scored.append((score, row))
+
+    # Greedily take the best summaries that still fit
+    selected = []
+    used = 0
+    for score, row in sorted(scored, key=lambda s: (-s[0], -s[1].id)):
+        cost = estimate_tokens(format_session(row.created_at, row.summary))
+        if used + cost > token_budget:
+            continue
+        selected.append(row)
+        used += cost
 
-    # Get all conversations from the last 90 days 
-    conversations=db.query(models.Conversation).filter(models.Conversations.user_id == user_id, models.Conversations.created_at >= datetime.now() - timedelta(days=90)).order_by(models.Conversations.created_at.desc()).all()
-    conversation_summaries = [conversation.summary for conversation in conversations]
-    full_context = "\n".join(conversation_summaries)
+    if not selected:
+        return ""
 
-    # Generate embedding for the query
-    
-    
+    selected.sort(key=lambda row: (row.created_at, row.id))
+    history_text = "".join(format_session(row.created_at, row.summary) for row in selected)
+    return f"CONVERSATION HISTORY (MOST RELEVANT, LAST {CONTEXT_HISTORY_DAYS} DAYS):\n{history_text}\n"
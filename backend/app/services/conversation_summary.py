@@ -1,11 +1,6 @@
-import openai
-import os 
-from dotenv import load_dotenv
+from app.services.openai_client import client, call_openai
 
-load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-def generate_conversation_summary(transcript: list[dict]) -> str:
+async def generate_conversation_summary(transcript: list[dict]) -> str:
     """Generate concise bullet-point summary of a conversation.
     
     Uses GPT-4o-mini to distill conversation into 2-3 sentence summary
@@ -22,7 +17,7 @@ def generate_conversation_summary(transcript: list[dict]) -> str:
 
     full_text = "".join(f"{msg['role']}: {msg['content']}" for msg in transcript) 
 
-    response = openai.chat.completions.create(
+    response = await call_openai(lambda: client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[
             {
@@ -37,6 +32,6 @@ def generate_conversation_summary(transcript: list[dict]) -> str:
             }
         ],
         temperature=0.3
-    )
+    ))
 
     return response.choices[0].message.content
\ No newline at end of file
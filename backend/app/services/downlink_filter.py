@@ -0,0 +1,117 @@
+import json
+import os
+from collections import defaultdict
+
+# Realtime event types the browser client actually reads (VoiceChat.jsx, Onboarding.jsx)
+DEFAULT_CLIENT_EVENTS = (
+    "response.output_audio.delta",
+    "input_audio_buffer.speech_stopped",
+    "conversation.item.created",
+    "error",
+)
+
+
+def _load_allowlist() -> frozenset | None:
+    """Parse DOWNLINK_EVENT_ALLOWLIST (comma-separated types, "*" forwards everything)."""
+    raw = os.getenv("DOWNLINK_EVENT_ALLOWLIST")
+    if raw is None:
+        return frozenset(DEFAULT_CLIENT_EVENTS)
+    if raw.strip() == "*":
+        return None
+    return frozenset(t.strip() for t in raw.split(",") if t.strip())
+
+
+DOWNLINK_EVENT_ALLOWLIST = _load_allowlist()
+DOWNLINK_PROJECTION = os.getenv("DOWNLINK_PROJECTION", "true").lower() == "true"
+
+
+def _project_item_created(event: dict) -> dict | None:
+    """Keep only the role and transcripts the client renders; drop items with none."""
+    item = event.get("item") or {}
+    content = [
+        {"transcript": part["transcript"]}
+        for part in item.get("content") or []
+        if part.get("transcript")
+    ]
+    if not item.get("role") or not content:
+        return None
+    return {"type": event["type"], "item": {"role": item["role"], "content": content}}
+
+
+def _project_error(event: dict) -> dict:
+    """Keep only the error message and code."""
+    error = event.get("error") or {}
+    return {"type": event["type"], "error": {"message": error.get("message"), "code": error.get("code")}}
+
+
+# Slimming functions for low-volume event types worth decoding. High-volume
+# types (audio deltas) are never projected so they stay parse-free.
+PROJECTIONS = {
+    "conversation.item.created": _project_item_created,
+    "error": _project_error,
+}
+
+
+class DownlinkFilter:
+    """Drop or slim downlink events the browser never reads.
+
+    Keeps per-type counters of forwarded, dropped and projected events so
+    the bandwidth saved per session can be reported.
+    """
+
+    def __init__(self, allowlist: frozenset | None = DOWNLINK_EVENT_ALLOWLIST, projection: bool = DOWNLINK_PROJECTION):
+        self.allowlist = allowlist
+        self.projection = projection
+        self.stats = defaultdict(lambda: {"forwarded": 0, "dropped": 0, "bytes_in": 0, "bytes_out": 0})
+
+    def apply(self, event_type: str, message: str, event: dict | None = None) -> str | None:
+        """Return the text to send to the client for an event, or None to drop it.
+
+        Args:
+            event_type: Event type from classify_event
+            message: Raw JSON text from OpenAI
+            event: Decoded event if the caller already has it
+
+        Returns:
+            Message to forward (original or projected), or None
+        """
+        stats = self.stats[event_type]
+        stats["bytes_in"] += len(message)
+
+        if self.allowlist is not None and event_type not in self.allowlist:
+            stats["dropped"] += 1
+            return None
+
+        project = PROJECTIONS.get(event_type) if self.projection else None
+        if project:
+            if event is None:
+                try:
+                    event = json.loads(message)
+                except json.JSONDecodeError:
+                    stats["dropped"] += 1
+                    return None
+            projected = project(event)
+            if projected is None:
+                stats["dropped"] += 1
+                return None
+            message = json.dumps(projected)
+
+        stats["forwarded"] += 1
+        stats["bytes_out"] += len(message)
+        return message
+
+    def totals(self) -> tuple[int, int]:
+        """Events and bytes received from OpenAI so far."""
+        events = sum(s["forwarded"] + s["dropped"] for s in self.stats.values())
+        return events, sum(s["bytes_in"] for s in self.stats.values())
+
+    def summary(self) -> dict:
+        """Totals plus per-type counters for this session."""
+        bytes_in = sum(s["bytes_in"] for s in self.stats.values())
+        bytes_out = sum(s["bytes_out"] for s in self.stats.values())
+        return {
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "bytes_saved": bytes_in - bytes_out,
+            "by_type": dict(self.stats),
+        }
@@ -1,11 +1,6 @@
-import openai
-import os
-from dotenv import load_dotenv
+from app.services.openai_client import client, call_openai
 
-load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-def generate_conversation_embedding(transcript: list[dict]) -> list[float]:
+async def generate_conversation_embedding(transcript: list[dict]) -> list[float]:
     """
     Generate embedding for full conversation transcript.
     
@@ -17,15 +12,15 @@ def generate_conversation_embedding(transcript: list[dict]) -> list[float]:
     """
     
     # Combine all messages into a single string for embedding
-    full_text = "".join([f"{msg["role"]}: {msg["content"]}" for msg in transcript])
+    full_text = "".join([f"{msg['role']}: {msg['content']}" for msg in transcript])
 
-    response = openai.embeddings.create(
+    response = await call_openai(lambda: client.embeddings.create(
         input=full_text, 
         model="text-embedding-3-small"
-    )
+    ))
     return response.data[0].embedding
 
-def generate_query_embedding(query: str) -> list[float]:
+async def generate_query_embedding(query: str) -> list[float]:
     """Generate vector embedding for a conversation transcript.
     
     Concatenates all messages from the transcript and generates a 1536-dimensional
@@ -38,8 +33,8 @@ def generate_query_embedding(query: str) -> list[float]:
         1536-dimensional embedding vector as list of floats
     """
 
-    response = openai.embeddings.create(
+    response = await call_openai(lambda: client.embeddings.create(
         input=query,
         model="text-embedding-3-small"
-    )
+    ))
     return response.data[0].embedding
\ No newline at end of file
@@ -21,6 +21,17 @@ def encrypt_data(plaintext: str) -> str:
     """
     return cipher.encrypt(plaintext.encode()).decode()
 
+def encrypt_many(plaintexts: list[str]) -> list[str]:
+    """Encrypt a batch of messages in one call (meant to run off the event loop).
+
+    Args:
+        plaintexts: Unencrypted message strings
+
+    Returns:
+        Ciphertexts in the same order
+    """
+    return [encrypt_data(plaintext) for plaintext in plaintexts]
+
 def decrypt_data(encrypted_text: str) -> str:
     """Decrypt message content using AES-256 (Fernet).
     
@@ -1,13 +1,26 @@
 from hume import AsyncHumeClient
-from hume.expression_measurement.stream import Config 
+from hume.expression_measurement.stream import Config, StreamModelsEndpointPayload
 from dotenv import load_dotenv
+from collections import deque
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
-import tempfile
+import asyncio
+import base64
+import logging
+import time
 import os
+import numpy as np
+import websockets
 from hume.expression_measurement.stream import StreamErrorMessage
+from app.services.metrics import HUME_STREAM_CHECKOUTS
+from app.services.audio_preprocessing import AUDIO_VAD_ENABLED, split_segments, voiced_segments
+from app.services.audio_coalescer import BYTES_PER_SAMPLE
+from app.services.audio_recorder import BYTES_PER_SECOND
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Weights for positive emotions to calculate weighted average
 POSITIVE_EMOTIONS = {
     "Calmness": 1.0,        # Mental peace = foundational to wellbeing
@@ -32,48 +45,286 @@ NEGATIVE_EMOTIONS = {
 
 TOTAL_EMOTIONS = {**POSITIVE_EMOTIONS, **NEGATIVE_EMOTIONS}
 
-async def analyze_emotion_with_hume(audio_bytes: bytes) -> dict:
+# Longest audio clip accepted by the Hume streaming API
+MAX_AUDIO_SECONDS = 5
+# Most windows analyzed per session; longer sessions are sampled evenly (1 = opening only)
+HUME_MAX_WINDOWS = int(os.getenv("HUME_MAX_WINDOWS", "24"))
+# Concurrent Hume requests per worker process
+HUME_MAX_CONCURRENCY = int(os.getenv("HUME_MAX_CONCURRENCY", "4"))
+
+# Idle stream connections are dropped after this long; Hume closes streams
+# that see no payload for about a minute, websockets pings cover the rest
+HUME_STREAM_IDLE_SECONDS = float(os.getenv("HUME_STREAM_IDLE_SECONDS", "45"))
+
+_semaphore = asyncio.Semaphore(HUME_MAX_CONCURRENCY)
+_PROSODY_CONFIG = Config(prosody={})
+
+
+class HumeStreamPool:
+    """Per-process Hume client with a pool of reusable stream connections.
+
+    Every analysis used to build a new AsyncHumeClient and open a new
+    websocket. Here one client is created lazily and connections go back to
+    the pool after a successful request, so back-to-back windows (and
+    sessions ending together) skip the handshake. A connection is only
+    reused if it has been idle less than HUME_STREAM_IDLE_SECONDS; one that
+    raised for any reason (an error, a close, a cancel mid-request) is never
+    returned, since a late reply could otherwise be read by the next caller.
+    Callers must reset Hume's per-stream context with every payload (see
+    `_predict_prosody`), because a connection serves many users in turn.
+    At most HUME_MAX_CONCURRENCY connections are kept idle, which is as many
+    as `_semaphore` lets run at once.
+    """
+
+    def __init__(self, max_idle: int = HUME_MAX_CONCURRENCY, idle_seconds: float = HUME_STREAM_IDLE_SECONDS):
+        self.max_idle = max_idle
+        self.idle_seconds = idle_seconds
+        self._client = None
+        self._idle = deque()  # (released_at, exit stack, socket), oldest first
+
+    async def _open(self):
+        if self._client is None:
+            self._client = AsyncHumeClient(api_key=os.environ.get("HUME_API_KEY"))
+        stack = AsyncExitStack()
+        try:
+            socket = await stack.enter_async_context(self._client.expression_measurement.stream.connect())
+        except BaseException:
+            await stack.aclose()
+            raise
+        return stack, socket
+
+    @asynccontextmanager
+    async def connection(self, fresh: bool = False):
+        """Yield a stream socket for one request, reusing an idle one unless `fresh`."""
+        entry = None
+        while self._idle and not fresh:
+            released_at, stack, socket = self._idle.pop()
+            if time.monotonic() - released_at < self.idle_seconds:
+                entry = (stack, socket)
+                HUME_STREAM_CHECKOUTS.labels("reused").inc()
+                break
+            await stack.aclose()
+        if entry is None:
+            entry = await self._open()
+            HUME_STREAM_CHECKOUTS.labels("opened").inc()
+
+        stack, socket = entry
+        try:
+            yield socket
+        except BaseException:
+            await stack.aclose()
+            raise
+        if len(self._idle) < self.max_idle:
+            self._idle.append((time.monotonic(), stack, socket))
+        else:
+            await stack.aclose()
+
+    async def close(self):
+        """Close idle connections on shutdown."""
+        while self._idle:
+            _, stack, _ = self._idle.popleft()
+            await stack.aclose()
+
+
+hume_pool = HumeStreamPool()
+
+
+def select_windows(total_seconds: float, window_seconds: float = MAX_AUDIO_SECONDS, max_windows: int = HUME_MAX_WINDOWS) -> list[float]:
+    """Start times of the Hume-sized windows to analyze for a session.
+
+    Short sessions are covered back to back; longer ones get max_windows
+    windows spread evenly from the first to the last second.
     """
-    Send audio to Hume AI for emotion analysis via prosody detection.
-    
-    Returns filtered scores for tracked positive/negative emotions only.
+    if total_seconds <= 0:
+        return []
+    count = min(max_windows, int(np.ceil(total_seconds / window_seconds)))
+    if count <= 1:
+        return [0.0]
+    if count * window_seconds >= total_seconds:
+        return [float(i * window_seconds) for i in range(count)]
+    step = (total_seconds - window_seconds) / (count - 1)
+    return [round(i * step, 3) for i in range(count)]
+
+
+def recording_view(recorder, start: float = 0.0, end: float | None = None) -> tuple[float, memoryview | bytes]:
+    """Zero-copy view of the audio still held between two points of a session recording.
+
+    Returns:
+        (second the view starts at, raw PCM16 view); the view is empty if no
+        audio in the range is held
     """
-    # Truncate to first 5 seconds (Hume API limit)
-    max_bytes = 5 * 48000
-    truncated_audio = audio_bytes[:max_bytes]
-    temp_path = None
-    
+    first = max(recorder.retained_from, start)
+    last = recorder.duration if end is None else min(end, recorder.duration)
+    if last <= first:
+        return first, memoryview(b"")
+    return first, recorder.window(first, last - first)
+
+
+def split_windows(pcm: memoryview | bytes, offset: float = 0.0, max_windows: int = HUME_MAX_WINDOWS) -> list[tuple[float, bytes]]:
+    """Copy the windows to analyze out of a stretch of recorded audio.
+
+    With voice activity detection on, windows are the voiced segments
+    (split at pauses, cut to MAX_AUDIO_SECONDS) so silence and the user
+    listening to the assistant are never uploaded; if there are more than
+    max_windows, an even spread is kept. Otherwise windows are placed by
+    `select_windows`. Only reads `pcm`, so it can run in a worker thread.
+
+    Args:
+        pcm: Mono PCM16 audio, e.g. from `recording_view`
+        offset: Second of the session `pcm` starts at
+        max_windows: Most windows to return
+
+    Returns:
+        (start second in the session, raw PCM16) pairs
+    """
+    if AUDIO_VAD_ENABLED:
+        pieces = split_segments(voiced_segments(pcm), MAX_AUDIO_SECONDS)
+        if len(pieces) > max_windows:
+            pieces = [pieces[i] for i in np.linspace(0, len(pieces) - 1, max_windows).round().astype(int)]
+        spans = [(piece_start, piece_end - piece_start) for piece_start, piece_end in pieces]
+    else:
+        total = len(pcm) / BYTES_PER_SECOND
+        spans = [(start, MAX_AUDIO_SECONDS) for start in select_windows(total, max_windows=max_windows)]
+
+    windows = []
+    for start, length in spans:
+        head = int(start * BYTES_PER_SECOND) // BYTES_PER_SAMPLE * BYTES_PER_SAMPLE
+        window = bytes(pcm[head:head + int(length * BYTES_PER_SECOND) // BYTES_PER_SAMPLE * BYTES_PER_SAMPLE])
+        if window:
+            windows.append((round(offset + start, 3), window))
+    return windows
+
+
+def extract_windows(recorder, start: float = 0.0, end: float | None = None, max_windows: int = HUME_MAX_WINDOWS) -> list[tuple[float, bytes]]:
+    """Copy the audio to analyze out of a session recording (see `split_windows`).
+
+    Args:
+        recorder: The session's SessionAudioRecorder
+        start: Offset in the session to start from, e.g. a turn's start
+        end: Offset to stop at; None means the end of the recording
+        max_windows: Most windows to return
+
+    Returns:
+        (start second, raw PCM16) pairs within the audio still held
+    """
+    offset, pcm = recording_view(recorder, start, end)
+    if not pcm:
+        return []
+    return split_windows(pcm, offset, max_windows)
+
+
+async def _predict_prosody(audio_bytes: bytes) -> list[dict]:
+    """Send one WAV clip to Hume and return tracked-emotion scores per prediction."""
+    # reset_stream drops the sliding-window context left by the connection's previous caller
+    payload = StreamModelsEndpointPayload(
+        data=base64.b64encode(audio_bytes).decode(), models=_PROSODY_CONFIG, reset_stream=True
+    )
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-            temp_file.write(truncated_audio)
-            temp_path = temp_file.name
-
-        client = AsyncHumeClient(api_key=os.environ.get("HUME_API_KEY"))
-        model_config = Config(prosody={})
-
-        async with client.expression_measurement.stream.connect() as socket:
-            result = await socket.send_file(temp_path, model_config)
-
-            if isinstance(result, StreamErrorMessage):
-                raise Exception(f"Hume API Error: {result.error}")
-            
-            # Extract predictions
-            full_result = result.model_dump()
-            print(f"Hume full_result keys: {full_result.keys() if full_result else 'None'}")
-            print(f"Hume prosody: {full_result.get('prosody')}")
-            predictions = full_result.get("prosody", {}).get("predictions", [])
-
-            # Filter to tracked emotions only
-            filtered_emotions = {
-                emotion["name"]: emotion["score"]
-                for pred in predictions
-                for emotion in pred.get("emotions", [])
-                if emotion["name"] in TOTAL_EMOTIONS
-            }
-            print(filtered_emotions)
-
-            return {"emotions": filtered_emotions, "analyzed_at": datetime.utcnow().isoformat()}
-    
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
\ No newline at end of file
+        async with hume_pool.connection() as socket:
+            await socket.send_publish(payload)
+            result = await socket.recv()
+    except websockets.ConnectionClosed:
+        # Hume may close an idle pooled connection first; retry once on a new one
+        async with hume_pool.connection(fresh=True) as socket:
+            await socket.send_publish(payload)
+            result = await socket.recv()
+
+    if isinstance(result, StreamErrorMessage):
+        raise Exception(f"Hume API Error: {result.error}")
+
+    # Extract predictions
+    full_result = result.model_dump()
+    logger.debug("Hume prosody result", extra={"prosody": full_result.get("prosody")})
+    predictions = full_result.get("prosody", {}).get("predictions") or []
+
+    # Filter to tracked emotions only, one dict per prediction
+    return [
+        {
+            emotion["name"]: emotion["score"]
+            for emotion in pred.get("emotions", [])
+            if emotion["name"] in TOTAL_EMOTIONS
+        }
+        for pred in predictions
+    ]
+
+
+def mean_scores(predictions: list[dict]) -> dict:
+    """Average each tracked emotion over the predictions that scored it."""
+    names = {name for pred in predictions for name in pred}
+    return {name: float(np.mean([pred[name] for pred in predictions if name in pred])) for name in names}
+
+
+async def predict_windows(windows: list[tuple[float, bytes]]) -> list[tuple[float, list[dict]]]:
+    """Send WAV windows to Hume concurrently, at most HUME_MAX_CONCURRENCY at a time.
+
+    Failed windows are dropped as long as at least one succeeds.
+
+    Args:
+        windows: (start second in the session, WAV clip) pairs
+
+    Returns:
+        (start second, per-prediction scores) for each window that succeeded
+    """
+    async def analyze(clip: bytes):
+        async with _semaphore:
+            return await _predict_prosody(clip)
+
+    results = await asyncio.gather(*(analyze(clip) for _, clip in windows), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if failures and len(failures) == len(results):
+        raise failures[0]
+    if failures:
+        logger.warning("Hume analysis failed for %s of %s windows: %s", len(failures), len(results), failures[0])
+    return [(start, predictions) for (start, _), predictions in zip(windows, results) if not isinstance(predictions, BaseException)]
+
+
+def aggregate_predictions(windows: list[tuple[float, list[dict]]]) -> dict:
+    """
+    Summarize per-window predictions into Conversation.emotion_data.
+
+    Returns:
+        {"emotions": per-emotion mean (what the analytics read),
+         "stats": per-emotion mean/max/p50/p90 over every prediction,
+         "timeline": [{"t": start second, "emotions": window means}],
+         "windows": windows with predictions, "analyzed_at": ISO timestamp}
+    """
+    timeline = []
+    samples = {}
+    for start, predictions in windows:
+        if not predictions:
+            continue
+        timeline.append({"t": start, "emotions": {name: round(score, 3) for name, score in mean_scores(predictions).items()}})
+        for pred in predictions:
+            for name, score in pred.items():
+                samples.setdefault(name, []).append(score)
+
+    stats = {}
+    for name, scores in samples.items():
+        p50, p90 = np.percentile(scores, [50, 90])
+        stats[name] = {
+            "mean": round(float(np.mean(scores)), 4),
+            "max": round(float(np.max(scores)), 4),
+            "p50": round(float(p50), 4),
+            "p90": round(float(p90), 4),
+        }
+
+    return {
+        "emotions": {name: values["mean"] for name, values in stats.items()},
+        "stats": stats,
+        "timeline": timeline,
+        "windows": len(timeline),
+        "analyzed_at": datetime.utcnow().isoformat(),
+    }
+
+
+async def analyze_emotion_windows(windows: list[tuple[float, bytes]]) -> dict:
+    """
+    Analyze a session's audio windows concurrently and aggregate the results.
+
+    Args:
+        windows: (start second in the session, WAV clip) pairs
+
+    Returns:
+        emotion_data dict, see `aggregate_predictions`
+    """
+    return aggregate_predictions(await predict_windows(windows))
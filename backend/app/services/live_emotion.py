@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import os
+
+from app import models
+from app.database import AsyncSessionLocal
+from app.services.audio_preprocessing import prepare_clip
+from app.services.hume_service import recording_view, split_windows, predict_windows, mean_scores
+
+# Analyze each user turn during the session instead of only after it
+LIVE_EMOTION_ANALYSIS = os.getenv("LIVE_EMOTION_ANALYSIS", "false").lower() == "true"
+# Hume windows per turn; long turns are sampled evenly
+LIVE_EMOTION_WINDOWS_PER_TURN = int(os.getenv("LIVE_EMOTION_WINDOWS_PER_TURN", "3"))
+# How long close-out waits for turns still being analyzed
+LIVE_EMOTION_DRAIN_SECONDS = float(os.getenv("LIVE_EMOTION_DRAIN_SECONDS", "10"))
+
+logger = logging.getLogger(__name__)
+
+
+def _prepare_clips(pcm: memoryview | bytes, offset: float) -> list[tuple[float, bytes]]:
+    """VAD, copy and WAV-encode a turn's windows; CPU-bound, so run off the event loop."""
+    return [(start, prepare_clip(window)) for start, window in split_windows(pcm, offset, LIVE_EMOTION_WINDOWS_PER_TURN)]
+
+
+class LiveEmotionAnalyzer:
+    """Per-session emotion analysis of each user turn while the session runs.
+
+    The relay reports turn boundaries from speech_started/speech_stopped;
+    the turn's audio is cut into clips in a worker thread and analyzed in
+    the background, and every result is stored as a TurnEmotion row right
+    away. `turns` holds the results so far for anything in the session
+    that wants to react to them.
+    """
+
+    def __init__(self, conversation_id: int, recorder):
+        self.conversation_id = conversation_id
+        self.recorder = recorder
+        self.turns = []
+        self.stored = 0
+        self._next_index = 0
+        self._tasks = set()
+
+    def submit_turn(self, start_seconds: float, end_seconds: float):
+        """Queue a finished user turn for analysis without waiting on it.
+
+        Only a view of the turn's audio is taken here; the recorder keeps
+        appending on the event loop, and audio already written never moves.
+        """
+        offset, pcm = recording_view(self.recorder, start_seconds, end_seconds)
+        if not pcm:
+            return
+        task = asyncio.create_task(self._analyze(self._next_index, start_seconds, end_seconds, offset, pcm))
+        self._next_index += 1
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _analyze(self, turn_index: int, start_seconds: float, end_seconds: float, offset: float, pcm: memoryview | bytes):
+        try:
+            clips = await asyncio.to_thread(_prepare_clips, pcm, offset)
+            if not clips:
+                return
+            results = await predict_windows(clips)
+            predictions = [pred for _, window in results for pred in window]
+            if not predictions:
+                return
+            emotions = mean_scores(predictions)
+            async with AsyncSessionLocal() as db:
+                db.add(models.TurnEmotion(
+                    conversation_id=self.conversation_id,
+                    turn_index=turn_index,
+                    start_seconds=start_seconds,
+                    end_seconds=end_seconds,
+                    emotions=emotions,
+                    predictions=predictions,
+                ))
+                await db.commit()
+            self.turns.append({"turn": turn_index, "start": start_seconds, "emotions": emotions})
+            self.stored += 1
+        except Exception as e:
+            logger.warning("Live emotion analysis failed for conversation %s turn %s: %s", self.conversation_id, turn_index, e)
+
+    async def drain(self) -> int:
+        """Wait (bounded) for turns still in flight, cancel the rest, and return how many turns were stored."""
+        if self._tasks:
+            _, pending = await asyncio.wait(set(self._tasks), timeout=LIVE_EMOTION_DRAIN_SECONDS)
+            for task in pending:
+                task.cancel()
+        return self.stored
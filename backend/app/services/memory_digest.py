@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import os
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app import models
+from app.database import SessionLocal
+from app.services.context_cache import context_cache
+from app.services.openai_client import client, call_openai
+from app.services.structured_logging import configure_logging
+
+# Bump when the digest prompt or shape changes; older digests can then be rebuilt offline
+DIGEST_FORMAT_VERSION = 1
+MEMORY_DIGEST_MAX_WORDS = int(os.getenv("MEMORY_DIGEST_MAX_WORDS", "400"))
+# Most recent folded conversation ids kept on a digest (retry idempotency and delete checks)
+MEMORY_DIGEST_TRACKED_IDS = int(os.getenv("MEMORY_DIGEST_TRACKED_IDS", "100"))
+# Summaries folded per GPT call when a digest is built from a user's whole history
+MEMORY_DIGEST_REPLAY_BATCH = int(os.getenv("MEMORY_DIGEST_REPLAY_BATCH", "10"))
+# Rounds a rebuild takes to catch up with conversations summarized or deleted while it runs
+MEMORY_DIGEST_REBUILD_ROUNDS = 3
+
+
+async def generate_memory_digest(previous_digest: str | None, summaries: list[str], profile_summary: str | None = None) -> str:
+    """Fold new session summaries into a user's rolling memory digest.
+
+    Uses GPT-4o-mini to merge the summaries into the previous digest,
+    keeping the result under MEMORY_DIGEST_MAX_WORDS so prompt size stays
+    constant however many sessions the user has.
+
+    Args:
+        previous_digest: Current digest, or None for the first session
+        summaries: Summaries of the sessions being folded in, oldest first
+        profile_summary: Onboarding profile, so the digest doesn't repeat it
+
+    Returns:
+        Updated digest as a concise bulleted list
+    """
+    profile = f"USER PROFILE (already known, do not repeat):\n{profile_summary}\n\n" if profile_summary else ""
+    new_sessions = "\n\n".join(summaries)
+    response = await call_openai(lambda: client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {
+                "role": "system",
+                "content": f"""You are a life coaching AI assistant maintaining a long-term memory of a user's coaching journey. Merge the new session summaries (oldest
+                first) into the existing memory. Keep lasting insights, recurring struggles, breakthroughs and progress on goals; drop details that no longer matter. Write a bulleted
+                list of at most {MEMORY_DIGEST_MAX_WORDS} words in third person.
+                """
+            },
+            {
+                "role": "user",
+                "content": f"{profile}EXISTING MEMORY:\n{previous_digest or '(none yet)'}\n\nNEW SESSION SUMMARIES:\n{new_sessions}"
+            }
+        ],
+        temperature=0.3
+    ))
+
+    return response.choices[0].message.content
+
+
+def get_latest_digest(db, user_id: int) -> models.MemoryDigest | None:
+    """Return the user's current digest (highest version)."""
+    return (
+        db.query(models.MemoryDigest)
+        .filter(models.MemoryDigest.user_id == user_id)
+        .order_by(models.MemoryDigest.version.desc())
+        .first()
+    )
+
+
+def _load_digest_inputs(user_id: int) -> tuple[models.MemoryDigest | None, str | None]:
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        return get_latest_digest(db, user_id), user.profile_summary if user else None
+    finally:
+        db.close()
+
+
+def _load_history(user_id: int) -> list:
+    """(id, summary) of the user's summarized conversations, oldest first."""
+    db = SessionLocal()
+    try:
+        return (
+            db.query(models.Conversation.id, models.Conversation.summary)
+            .filter(models.Conversation.user_id == user_id, models.Conversation.summary.isnot(None))
+            .order_by(models.Conversation.created_at.asc(), models.Conversation.id.asc())
+            .all()
+        )
+    finally:
+        db.close()
+
+
+async def replay_summaries(summaries: list[str], profile_summary: str | None = None, content: str | None = None) -> str | None:
+    """Fold summaries into a digest (from scratch by default), MEMORY_DIGEST_REPLAY_BATCH per call."""
+    for first in range(0, len(summaries), MEMORY_DIGEST_REPLAY_BATCH):
+        content = await generate_memory_digest(content, summaries[first:first + MEMORY_DIGEST_REPLAY_BATCH], profile_summary)
+    return content
+
+
+def _store_digest(user_id: int, version: int | None, content: str, conversation_ids: list[int]):
+    """Insert a new digest version.
+
+    An update built on version N stores N + 1; if a concurrent update got
+    there first it fails on (user_id, version) and is retried by the caller.
+    With version None the next free version is taken when inserting, for
+    a replay that does not build on the current digest.
+    """
+    db = SessionLocal()
+    try:
+        if version is None:
+            latest = get_latest_digest(db, user_id)
+            version = latest.version + 1 if latest else 1
+        db.add(models.MemoryDigest(
+            user_id=user_id,
+            version=version,
+            format_version=DIGEST_FORMAT_VERSION,
+            content=content,
+            conversation_ids=conversation_ids,
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def is_folded(db, user_id: int, conversation_id: int) -> bool:
+    """Whether a conversation is already part of the user's current digest."""
+    latest = get_latest_digest(db, user_id)
+    return latest is not None and conversation_id in (latest.conversation_ids or [])
+
+
+def _track(conversation_ids: list[int]) -> list[int]:
+    return conversation_ids[-MEMORY_DIGEST_TRACKED_IDS:]
+
+
+def may_include(digest: models.MemoryDigest, conversation_id: int) -> bool:
+    """Whether a conversation's summary may be folded into a digest.
+
+    Only the latest MEMORY_DIGEST_TRACKED_IDS ids are kept, so once the list
+    is full any older conversation is assumed to be folded in.
+    """
+    tracked = digest.conversation_ids or []
+    return conversation_id in tracked or (len(tracked) >= MEMORY_DIGEST_TRACKED_IDS and conversation_id < min(tracked))
+
+
+def discard_digests_including(db, user_id: int, conversation_id: int) -> bool:
+    """Delete the user's digests if they may contain a conversation being deleted.
+
+    Runs in the caller's transaction, so the digests go with the
+    conversation. Every version is removed, since any of them may hold the
+    deleted content; sessions fall back to retrieved summaries until
+    `rebuild_memory_digest` replays the remaining conversations.
+
+    Returns:
+        True if digests were discarded and a rebuild is due
+    """
+    latest = get_latest_digest(db, user_id)
+    if latest is None or not may_include(latest, conversation_id):
+        return False
+    db.query(models.MemoryDigest).filter(models.MemoryDigest.user_id == user_id).delete(synchronize_session=False)
+    return True
+
+
+async def update_memory_digest(user_id: int, conversation_id: int, summary: str):
+    """Fold a newly summarized conversation into the user's digest (no-op if already folded).
+
+    Args:
+        user_id: Owner of the conversation
+        conversation_id: Conversation the summary belongs to
+        summary: The conversation's summary
+    """
+    latest, profile_summary = await asyncio.to_thread(_load_digest_inputs, user_id)
+    folded = list(latest.conversation_ids or []) if latest else []
+    if conversation_id in folded:
+        return
+
+    if latest is None:
+        # The first digest replaces retrieved summaries in the session prompt,
+        # so it must cover the sessions that came before it, not just this one
+        history = [c for c in await asyncio.to_thread(_load_history, user_id) if c.id != conversation_id]
+        content = await replay_summaries([c.summary for c in history] + [summary], profile_summary)
+        await asyncio.to_thread(_store_digest, user_id, 1, content, _track([c.id for c in history] + [conversation_id]))
+        return
+
+    content = await generate_memory_digest(latest.content, [summary], profile_summary)
+    await asyncio.to_thread(_store_digest, user_id, latest.version + 1, content, _track(folded + [conversation_id]))
+
+
+async def rebuild_memory_digest(user_id: int):
+    """Rebuild a user's digest from scratch by replaying every summary in order.
+
+    Runs as a post-session job after a delete, or offline (see `_main`).
+    Conversations summarized while the replay runs are folded in before
+    storing; if any replayed conversation was deleted meanwhile, the replay
+    starts over without it. The result is stored as a new version, so
+    earlier digests stay available (unless they were discarded because a
+    conversation was deleted).
+    """
+    _, profile_summary = await asyncio.to_thread(_load_digest_inputs, user_id)
+    history = await asyncio.to_thread(_load_history, user_id)
+    content, folded = None, []
+    for _ in range(MEMORY_DIGEST_REBUILD_ROUNDS):
+        current = {c.id for c in history}
+        if not current.issuperset(folded):
+            content, folded = None, []
+        pending = [c for c in history if c.id not in set(folded)]
+        if not pending:
+            break
+        content = await replay_summaries([c.summary for c in pending], profile_summary, content)
+        folded += [c.id for c in pending]
+        history = await asyncio.to_thread(_load_history, user_id)
+    else:
+        raise RuntimeError(f"Conversations of user {user_id} kept changing during the digest rebuild")
+
+    if not folded:
+        return
+    for attempt in range(MEMORY_DIGEST_REBUILD_ROUNDS):
+        try:
+            await asyncio.to_thread(_store_digest, user_id, None, content, _track(folded))
+            break
+        except IntegrityError:
+            # An update stored the same version first; take the next one
+            if attempt == MEMORY_DIGEST_REBUILD_ROUNDS - 1:
+                raise
+    await context_cache.invalidate(user_id)
+
+
+def _stale_user_ids() -> list[int]:
+    """Users whose current digest was built with an older DIGEST_FORMAT_VERSION."""
+    db = SessionLocal()
+    try:
+        latest = (
+            db.query(models.MemoryDigest.user_id, func.max(models.MemoryDigest.version).label("version"))
+            .group_by(models.MemoryDigest.user_id)
+            .subquery()
+        )
+        rows = (
+            db.query(models.MemoryDigest.user_id)
+            .join(latest, (models.MemoryDigest.user_id == latest.c.user_id) & (models.MemoryDigest.version == latest.c.version))
+            .filter(models.MemoryDigest.format_version < DIGEST_FORMAT_VERSION)
+            .all()
+        )
+        return [row.user_id for row in rows]
+    finally:
+        db.close()
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Rebuild user memory digests offline")
+    parser.add_argument("--user-id", type=int, action="append", help="Rebuild this user (repeatable)")
+    parser.add_argument("--stale", action="store_true", help="Rebuild every digest older than DIGEST_FORMAT_VERSION")
+    args = parser.parse_args()
+    configure_logging()
+
+    user_ids = list(args.user_id or [])
+    if args.stale:
+        user_ids += await asyncio.to_thread(_stale_user_ids)
+    for user_id in user_ids:
+        await rebuild_memory_digest(user_id)
+        print(f"Rebuilt memory digest for user {user_id}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
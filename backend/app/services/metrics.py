@@ -0,0 +1,182 @@
+import os
+
+from sqlalchemy import event
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Seconds; tuned for sub-second realtime paths with a tail into slow API calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Post-session stages call external APIs and can take much longer
+STAGE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+ACTIVE_SESSIONS = Gauge(
+    "pono_voice_active_sessions", "Voice sessions currently relaying", multiprocess_mode="livesum"
+)
+SESSION_START_SECONDS = Histogram(
+    "pono_voice_session_start_seconds", "Voice session bootstrap time by phase", ["phase"], buckets=LATENCY_BUCKETS
+)
+TURN_LATENCY_SECONDS = Histogram(
+    "pono_voice_turn_latency_seconds", "Time from speech_stopped to the first assistant audio delta", buckets=LATENCY_BUCKETS
+)
+MODERATION_SECONDS = Histogram(
+    "pono_moderation_seconds", "Moderation API call latency", buckets=LATENCY_BUCKETS
+)
+TOOL_CALL_DB_SECONDS = Histogram(
+    "pono_voice_tool_call_db_seconds", "Database time of a tool call", ["tool"], buckets=LATENCY_BUCKETS
+)
+RELAY_EVENTS = Counter("pono_voice_relay_events_total", "Messages relayed", ["direction"])
+RELAY_BYTES = Counter("pono_voice_relay_bytes_total", "Message bytes relayed", ["direction"])
+DOWNLINK_EVENTS = Counter(
+    "pono_voice_downlink_events_total", "OpenAI events by type, forwarded to the client or dropped", ["event_type", "outcome"]
+)
+DOWNLINK_BYTES = Counter(
+    "pono_voice_downlink_bytes_total", "OpenAI event bytes by type, as received and as forwarded", ["event_type", "stage"]
+)
+POST_SESSION_STAGE_SECONDS = Histogram(
+    "pono_post_session_stage_seconds", "Post-session processing time by stage", ["stage", "status"], buckets=STAGE_BUCKETS
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "pono_http_request_seconds", "REST request latency", ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+HUME_STREAM_CHECKOUTS = Counter(
+    "pono_hume_stream_checkouts_total", "Hume stream connections handed out, reused from the pool or newly opened", ["result"]
+)
+REALTIME_POOL_CHECKOUTS = Counter(
+    "pono_realtime_pool_checkouts_total", "OpenAI Realtime connections handed out, warm from the pool or newly opened", ["result"]
+)
+DB_POOL_SIZE = Gauge(
+    "pono_db_pool_size", "Configured pool size (persistent connections)", ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "pono_db_pool_connections", "Pooled connections by state (checked_out, idle, overflow)", ["engine", "state"],
+    multiprocess_mode="livesum",
+)
+
+
+class RelayCounter:
+    """Per-session tally of relayed messages, pushed to the shared counters in batches.
+
+    Counter.inc takes a lock, which is measurable at audio frame rates, so
+    the relay loops only bump local integers and flush every FLUSH_EVERY
+    messages (and once more when the session ends). The downlink skips
+    even that: DownlinkFilter already counts every event, and its totals
+    are pushed with `flush_totals` once per turn.
+    """
+
+    FLUSH_EVERY = 100
+
+    def __init__(self, direction: str):
+        self.events = RELAY_EVENTS.labels(direction)
+        self.bytes = RELAY_BYTES.labels(direction)
+        self.pending_events = 0
+        self.pending_bytes = 0
+        self.flushed_events = 0
+        self.flushed_bytes = 0
+
+    def add(self, size: int):
+        self.pending_events += 1
+        self.pending_bytes += size
+        if self.pending_events >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush_totals(self, events: int, size: int):
+        """Push running totals counted elsewhere (e.g. DownlinkFilter), adding only what is new."""
+        self.pending_events = events - self.flushed_events
+        self.pending_bytes = size - self.flushed_bytes
+        self.flush()
+
+    def flush(self):
+        if self.pending_events:
+            self.flushed_events += self.pending_events
+            self.flushed_bytes += self.pending_bytes
+            self.events.inc(self.pending_events)
+            self.bytes.inc(self.pending_bytes)
+            self.pending_events = 0
+            self.pending_bytes = 0
+
+
+def observe_session_start(timings: dict):
+    """Record a session's bootstrap phase timings (milliseconds, as logged)."""
+    for phase, ms in timings.items():
+        SESSION_START_SECONDS.labels(phase).observe(ms / 1000)
+
+
+# Labelled children by (metric, labels); .labels() takes a lock on every call
+_downlink_children = {}
+
+
+def _downlink_child(metric, *labels):
+    key = (metric, labels)
+    child = _downlink_children.get(key)
+    if child is None:
+        child = _downlink_children[key] = metric.labels(*labels)
+    return child
+
+
+def observe_downlink(by_type: dict):
+    """Record a session's DownlinkFilter per-type counters once it ends."""
+    for event_type, stats in by_type.items():
+        event_type = event_type or "unknown"
+        for outcome in ("forwarded", "dropped"):
+            if stats[outcome]:
+                _downlink_child(DOWNLINK_EVENTS, event_type, outcome).inc(stats[outcome])
+        _downlink_child(DOWNLINK_BYTES, event_type, "in").inc(stats["bytes_in"])
+        if stats["bytes_out"]:
+            _downlink_child(DOWNLINK_BYTES, event_type, "out").inc(stats["bytes_out"])
+
+
+def instrument_pool(name: str, engine):
+    """Track a SQLAlchemy engine's pool utilization in the DB_POOL_* gauges.
+
+    The gauges are set from the pool's own counters on every checkout and
+    checkin, so each worker process reports fresh values without a custom
+    collector (which multiprocess mode would not aggregate).
+
+    Args:
+        name: Label value, e.g. "sync" or "async"
+        engine: Sync Engine (pass `async_engine.sync_engine` for the async one)
+    """
+    pool = engine.pool
+    size = DB_POOL_SIZE.labels(name)
+    checked_out = DB_POOL_CONNECTIONS.labels(name, "checked_out")
+    idle = DB_POOL_CONNECTIONS.labels(name, "idle")
+    overflow = DB_POOL_CONNECTIONS.labels(name, "overflow")
+
+    def update(returning: int = 0):
+        idle_count = pool.checkedin()
+        overflow_count = pool.overflow()
+        if returning:
+            # checkin fires before the connection is handed back: it joins the
+            # idle queue, or is closed if the queue is full (an overflow connection)
+            if idle_count < pool.size():
+                idle_count += 1
+            else:
+                overflow_count -= 1
+        size.set(pool.size())
+        checked_out.set(pool.checkedout() - returning)
+        idle.set(idle_count)
+        overflow.set(max(overflow_count, 0))
+
+    event.listen(engine, "checkout", lambda *_: update())
+    event.listen(engine, "checkin", lambda *_: update(returning=1))
+    update()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Serialize every metric for a scrape.
+
+    Under several worker processes set PROMETHEUS_MULTIPROC_DIR so each
+    worker writes its samples there and any worker can serve the total.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from app.services.metrics import MODERATION_SECONDS
+from app.services.openai_client import client, call_openai
+from app.services.tracing import tracer
+
+MODERATION_CACHE_TTL_SECONDS = float(os.getenv("MODERATION_CACHE_TTL_SECONDS", "300"))
+MODERATION_CACHE_SIZE = int(os.getenv("MODERATION_CACHE_SIZE", "2048"))
+# Max transcripts per moderation request, and how long to wait for more to arrive
+MODERATION_BATCH_SIZE = int(os.getenv("MODERATION_BATCH_SIZE", "8"))
+MODERATION_BATCH_WINDOW_MS = int(os.getenv("MODERATION_BATCH_WINDOW_MS", "0"))
+# How long a session's end waits for transcripts still queued for moderation
+MODERATION_DRAIN_SECONDS = float(os.getenv("MODERATION_DRAIN_SECONDS", "5"))
+
+NOT_FLAGGED = {"flagged": False, "categories": {}}
+
+logger = logging.getLogger(__name__)
+
+# Normalized text -> (expiry time, result); shared by all sessions on this worker
+_cache = OrderedDict()
+
+
+def _cache_key(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _cache_get(text: str) -> dict | None:
+    key = _cache_key(text)
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    expires_at, result = entry
+    if expires_at < time.monotonic():
+        del _cache[key]
+        return None
+    _cache.move_to_end(key)
+    return result
+
+
+def _cache_put(text: str, result: dict):
+    _cache[_cache_key(text)] = (time.monotonic() + MODERATION_CACHE_TTL_SECONDS, result)
+    _cache.move_to_end(_cache_key(text))
+    while len(_cache) > MODERATION_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+async def check_content_moderation(texts: list[str], user_id: int) -> list[dict]:
+    """Check texts against OpenAI Moderation API for policy violations.
+
+    Cached results are reused; the rest go out in a single batched request.
+
+    Args:
+        texts: Transcripts to check
+        user_id: User ID for moderation logging
+
+    Returns:
+        One {"flagged", "categories"} dict per text, in order
+    """
+    results = [_cache_get(text) for text in texts]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    try:
+        with MODERATION_SECONDS.time(), tracer.start_as_current_span("moderation.check", attributes={"texts": len(pending)}):
+            response = await call_openai(
+                lambda: client.moderations.create(input=[texts[i] for i in pending])
+            )
+        for i, result in zip(pending, response.results):
+            results[i] = {
+                "flagged": result.flagged,
+                "categories": result.categories.model_dump(),
+            }
+            _cache_put(texts[i], results[i])
+            if result.flagged:
+                logger.warning("Moderation violation", extra={"user_id": user_id, "categories": results[i]["categories"]})
+    except Exception as e:
+        # Fail open on moderation errors
+        logger.warning("Moderation check failed for user %s: %s", user_id, e)
+        for i in pending:
+            results[i] = NOT_FLAGGED
+
+    return results
+
+
+class ModerationPipeline:
+    """Per-session moderation that runs beside the relay instead of inside it.
+
+    The relay calls `submit` and keeps forwarding audio; `run` checks queued
+    transcripts in batches and awaits `on_flagged(key, text, result)` for the
+    first violation, where `key` identifies the submission. At the end of a
+    session `drain` waits for the verdicts still outstanding.
+    """
+
+    def __init__(self, user_id: int, on_flagged):
+        self.user_id = user_id
+        self.on_flagged = on_flagged
+        self._queue = asyncio.Queue()
+        self._unchecked = 0
+
+    def submit(self, text: str, key=None):
+        """Queue a transcript for moderation without waiting on the result."""
+        self._unchecked += 1
+        self._queue.put_nowait((key, text))
+
+    async def _next_batch(self) -> list[tuple]:
+        batch = [await self._queue.get()]
+        if MODERATION_BATCH_WINDOW_MS > 0:
+            await asyncio.sleep(MODERATION_BATCH_WINDOW_MS / 1000)
+        while len(batch) < MODERATION_BATCH_SIZE and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                results = await check_content_moderation([text for _, text in batch], self.user_id)
+                for (key, text), result in zip(batch, results):
+                    if result["flagged"]:
+                        await self.on_flagged(key, text, result)
+                        return
+            finally:
+                self._unchecked -= len(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def drain(self, task: asyncio.Task):
+        """Wait (bounded) until every submitted transcript is checked, then stop `task` running `run`."""
+        if not self._unchecked or task.done():
+            task.cancel()
+            return
+        checked = asyncio.create_task(self._queue.join())
+        done, _ = await asyncio.wait({checked, task}, timeout=MODERATION_DRAIN_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            logger.warning("Moderation drain timed out for user %s with %s transcripts unchecked", self.user_id, self._queue.qsize())
+        checked.cancel()
+        task.cancel()
@@ -0,0 +1,50 @@
+import asyncio
+import os
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+load_dotenv()
+
+# Per-attempt HTTP timeout; the SDK retries timeouts, 429s and 5xx with exponential backoff
+OPENAI_REQUEST_TIMEOUT_SECONDS = float(os.getenv("OPENAI_REQUEST_TIMEOUT_SECONDS", "20"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+# Overall deadline for one helper call, retries included
+OPENAI_CALL_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CALL_TIMEOUT_SECONDS", "60"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "50"))
+# Max in-flight requests per worker, so a burst of hang-ups can't starve moderation
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+
+# Shared client: one connection pool per worker process
+client = AsyncOpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    timeout=OPENAI_REQUEST_TIMEOUT_SECONDS,
+    max_retries=OPENAI_MAX_RETRIES,
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+        ),
+    ),
+)
+
+_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+
+async def call_openai(make_request, timeout: float = OPENAI_CALL_TIMEOUT_SECONDS):
+    """Run an OpenAI request under the shared concurrency limit and a deadline.
+
+    Args:
+        make_request: Zero-argument callable returning the SDK coroutine,
+            e.g. `lambda: client.embeddings.create(...)`
+        timeout: Overall deadline in seconds, retries included
+
+    Returns:
+        The SDK response
+
+    Raises:
+        asyncio.TimeoutError: If the deadline passes
+    """
+    async with _semaphore:
+        return await asyncio.wait_for(make_request(), timeout)
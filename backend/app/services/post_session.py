@@ -0,0 +1,382 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+
+from app import models
+from app.database import SessionLocal
+from app.services.context_cache import context_cache
+from app.services.conversation_summary import generate_conversation_summary
+from app.services.embedding_service import generate_conversation_embedding
+from app.services.encryption import decrypt_data
+from app.services.hume_service import aggregate_predictions, analyze_emotion_windows
+from app.services.audio_preprocessing import prepare_clip
+from app.services.memory_digest import is_folded, rebuild_memory_digest, update_memory_digest
+from app.services.metrics import POST_SESSION_STAGE_SECONDS
+from app.services.tracing import tracer, inject_context, extract_context
+
+POST_SESSION_WORKERS = int(os.getenv("POST_SESSION_WORKERS", "2"))
+POST_SESSION_MAX_ATTEMPTS = int(os.getenv("POST_SESSION_MAX_ATTEMPTS", "5"))
+POST_SESSION_POLL_SECONDS = float(os.getenv("POST_SESSION_POLL_SECONDS", "2"))
+POST_SESSION_LEASE_SECONDS = int(os.getenv("POST_SESSION_LEASE_SECONDS", "600"))
+POST_SESSION_RETRY_SECONDS = int(os.getenv("POST_SESSION_RETRY_SECONDS", "10"))
+
+logger = logging.getLogger(__name__)
+
+
+async def _embedding_stage(job: dict):
+    return await generate_conversation_embedding(job["transcript"])
+
+
+async def _summary_stage(job: dict):
+    return await generate_conversation_summary(job["transcript"])
+
+
+def _load_turn_predictions(conversation_id: int) -> list[tuple[float, list[dict]]]:
+    db = SessionLocal()
+    try:
+        rows = db.query(models.TurnEmotion).filter(
+            models.TurnEmotion.conversation_id == conversation_id
+        ).order_by(models.TurnEmotion.turn_index).all()
+        return [(row.start_seconds, row.predictions) for row in rows]
+    finally:
+        db.close()
+
+
+async def _emotion_stage(job: dict):
+    if job["audio"] is None:
+        # Turns were analyzed during the session; only aggregate what they stored
+        return aggregate_predictions(await asyncio.to_thread(_load_turn_predictions, job["conversation_id"]))
+    if not job["audio"] or not job["audio_windows"]:
+        # Nothing voiced was recorded; the stage is done with no result
+        return None
+    clips = []
+    offset = 0
+    for start, size in job["audio_windows"]:
+        clips.append((start, prepare_clip(job["audio"][offset:offset + size])))
+        offset += size
+    return await analyze_emotion_windows(clips)
+
+
+# Stage name -> (Conversation column it fills, coroutine producing the value)
+STAGES = {
+    "embedding": ("embedding", _embedding_stage),
+    "summary": ("summary", _summary_stage),
+    "emotion": ("emotion_data", _emotion_stage),
+}
+
+# Runs after the stages above, once the conversation has a summary
+DIGEST_STAGE = "digest"
+# The only stage of user-level jobs: replay the user's summaries into a new digest
+DIGEST_REBUILD_STAGE = "digest_rebuild"
+
+
+def enqueue_post_session_job(
+    db, conversation_id: int, stages: list[str], audio: bytes | None = None, audio_windows: list | None = None
+) -> models.PostSessionJob:
+    """Queue post-session processing for a closed conversation.
+
+    The job is added to the caller's transaction, so it is committed
+    atomically with the transcript it processes. The current trace context
+    is stored with it so the worker's spans join the session's trace.
+
+    Args:
+        db: Database session
+        conversation_id: Conversation to process
+        stages: Names of STAGES to run
+        audio: Concatenated PCM16 windows for the emotion stage; None if
+            the session's turns were analyzed live (see live_emotion)
+        audio_windows: [start second, byte length] of each window in `audio`
+
+    Returns:
+        The pending job
+    """
+    job = models.PostSessionJob(
+        conversation_id=conversation_id,
+        status="pending",
+        attempts=0,
+        run_after=datetime.utcnow(),
+        payload={"stages": list(stages), "audio_windows": audio_windows or [], "trace": inject_context()},
+        audio=audio,
+    )
+    db.add(job)
+    return job
+
+
+def enqueue_digest_rebuild(db, user_id: int) -> models.PostSessionJob | None:
+    """Queue a rebuild of a user's memory digest in the caller's transaction.
+
+    A rebuild that has not started yet will read the conversations as they
+    are when it runs, so no second one is queued next to it.
+
+    Returns:
+        The pending job, or None if one was already waiting
+    """
+    waiting = (
+        db.query(models.PostSessionJob)
+        .filter(
+            models.PostSessionJob.user_id == user_id,
+            models.PostSessionJob.conversation_id.is_(None),
+            models.PostSessionJob.status == "pending",
+        )
+        .first()
+    )
+    if waiting:
+        return None
+    job = models.PostSessionJob(
+        user_id=user_id,
+        status="pending",
+        attempts=0,
+        run_after=datetime.utcnow(),
+        payload={"stages": [DIGEST_REBUILD_STAGE], "trace": inject_context()},
+    )
+    db.add(job)
+    return job
+
+
+def _claim_next_job() -> int | None:
+    """Lease the oldest runnable job, including running jobs whose worker died."""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        job = (
+            db.query(models.PostSessionJob)
+            .filter(
+                or_(
+                    and_(models.PostSessionJob.status == "pending", models.PostSessionJob.run_after <= now),
+                    and_(models.PostSessionJob.status == "running", models.PostSessionJob.locked_until < now),
+                )
+            )
+            .order_by(models.PostSessionJob.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not job:
+            return None
+
+        if job.attempts >= POST_SESSION_MAX_ATTEMPTS:
+            job.status = "failed"
+            job.updated_at = now
+            db.commit()
+            return None
+
+        job.status = "running"
+        job.attempts += 1
+        job.locked_until = now + timedelta(seconds=POST_SESSION_LEASE_SECONDS)
+        job.updated_at = now
+        db.commit()
+        return job.id
+    finally:
+        db.close()
+
+
+def _load_job(job_id: int) -> dict | None:
+    """Return the job's conversation, stages still to run, decrypted transcript and audio clip."""
+    db = SessionLocal()
+    try:
+        job = db.query(models.PostSessionJob).filter(models.PostSessionJob.id == job_id).first()
+        if job.conversation_id is None:
+            # User-level job: its stages load what they need themselves
+            return {
+                "user_id": job.user_id,
+                "conversation_id": None,
+                "summary": None,
+                "stages": [name for name in (job.payload or {}).get("stages", []) if name == DIGEST_REBUILD_STAGE],
+                "transcript": [],
+                "audio": None,
+                "audio_windows": [],
+                "trace": (job.payload or {}).get("trace"),
+            }
+        conversation = db.query(models.Conversation).filter(models.Conversation.id == job.conversation_id).first()
+        if not conversation:
+            return None
+
+        # Skip stages whose result is already stored (idempotent on retry)
+        stages = [
+            name for name in (job.payload or {}).get("stages", [])
+            if (name in STAGES and getattr(conversation, STAGES[name][0]) is None)
+            or (name == DIGEST_STAGE and not is_folded(db, conversation.user_id, conversation.id))
+        ]
+
+        messages = (
+            db.query(models.Message)
+            .filter(models.Message.conversation_id == conversation.id)
+            .order_by(models.Message.id.asc())
+            .all()
+        )
+        transcript = [{"role": m.role, "content": decrypt_data(m.content)} for m in messages]
+        return {
+            "user_id": conversation.user_id,
+            "conversation_id": conversation.id,
+            "summary": conversation.summary,
+            "stages": stages,
+            "transcript": transcript,
+            "audio": job.audio,
+            "audio_windows": (job.payload or {}).get("audio_windows"),
+            "trace": (job.payload or {}).get("trace"),
+        }
+    finally:
+        db.close()
+
+
+def _save_results(job_id: int, results: dict):
+    """Store successful stage results and either finish the job or schedule a retry."""
+    db = SessionLocal()
+    try:
+        job = db.query(models.PostSessionJob).filter(models.PostSessionJob.id == job_id).first()
+        conversation = db.query(models.Conversation).filter(models.Conversation.id == job.conversation_id).first()
+        errors = {}
+        for name, result in results.items():
+            if isinstance(result, BaseException):
+                errors[name] = f"{type(result).__name__}: {result}"
+            elif conversation is not None and name in STAGES:
+                setattr(conversation, STAGES[name][0], result)
+
+        now = datetime.utcnow()
+        job.updated_at = now
+        job.locked_until = None
+        if not errors:
+            job.status = "done"
+            job.last_error = None
+            job.audio = None
+        elif job.attempts >= POST_SESSION_MAX_ATTEMPTS:
+            job.status = "failed"
+            job.last_error = str(errors)
+        else:
+            job.status = "pending"
+            job.last_error = str(errors)
+            job.run_after = now + timedelta(seconds=POST_SESSION_RETRY_SECONDS * 2 ** (job.attempts - 1))
+        db.commit()
+        return errors
+    finally:
+        db.close()
+
+
+async def _timed_stage(name: str, coro):
+    """Await one stage, recording its duration and outcome."""
+    started = time.perf_counter()
+    status = "error"
+    try:
+        with tracer.start_as_current_span(f"post_session.{name}"):
+            result = await coro
+        status = "ok"
+        return result
+    finally:
+        POST_SESSION_STAGE_SECONDS.labels(name, status).observe(time.perf_counter() - started)
+
+
+async def process_post_session_job(job_id: int) -> dict:
+    """Run a job's remaining stages concurrently and persist what succeeded.
+
+    Args:
+        job_id: Leased job to process
+
+    Returns:
+        Dict of stage name -> error message for stages that failed
+    """
+    load_started = time.time_ns()
+    job = await asyncio.to_thread(_load_job, job_id)
+    if job is None:
+        # Conversation was deleted; nothing left to do
+        return await asyncio.to_thread(_save_results, job_id, {})
+
+    attributes = {"user.id": job["user_id"], "job.id": job_id}
+    if job["conversation_id"] is not None:
+        attributes["conversation.id"] = job["conversation_id"]
+    with tracer.start_as_current_span(
+        "post_session.job",
+        context=extract_context(job["trace"]),
+        start_time=load_started,
+        attributes=attributes,
+    ):
+        tracer.start_span("post_session.load_and_decrypt", start_time=load_started).end()
+        return await _run_stages(job_id, job)
+
+
+async def _run_stages(job_id: int, job: dict) -> dict:
+    """Run a loaded job's stages and save what succeeded."""
+    concurrent = [name for name in job["stages"] if name in STAGES]
+    results = await asyncio.gather(
+        *(_timed_stage(name, STAGES[name][1](job)) for name in concurrent),
+        return_exceptions=True,
+    )
+    results = dict(zip(concurrent, results))
+
+    # Fold the summary into the user's rolling memory digest
+    if DIGEST_STAGE in job["stages"]:
+        summary = results.get("summary", job["summary"])
+        if isinstance(summary, str):
+            try:
+                results[DIGEST_STAGE] = await _timed_stage(
+                    DIGEST_STAGE, update_memory_digest(job["user_id"], job["conversation_id"], summary)
+                )
+            except Exception as e:
+                results[DIGEST_STAGE] = e
+        else:
+            results[DIGEST_STAGE] = RuntimeError("No summary to fold into the memory digest")
+
+    if DIGEST_REBUILD_STAGE in job["stages"]:
+        try:
+            results[DIGEST_REBUILD_STAGE] = await _timed_stage(DIGEST_REBUILD_STAGE, rebuild_memory_digest(job["user_id"]))
+        except Exception as e:
+            results[DIGEST_REBUILD_STAGE] = e
+
+    errors = await asyncio.to_thread(_save_results, job_id, results)
+
+    # A new summary or digest changes the context injected at session start
+    if any(name in results and name not in errors for name in ("summary", DIGEST_STAGE)):
+        await context_cache.invalidate(job["user_id"])
+    return errors
+
+
+class PostSessionWorkerPool:
+    """Background workers that drain the post_session_jobs table.
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+    of workers across processes can share the queue. Workers poll every
+    POST_SESSION_POLL_SECONDS, or immediately after `notify`.
+    """
+
+    def __init__(self, size: int = POST_SESSION_WORKERS):
+        self.size = size
+        self._tasks = []
+        self._wake = asyncio.Event()
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.size)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers, e.g. right after a job was enqueued."""
+        self._wake.set()
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                job_id = await asyncio.to_thread(_claim_next_job)
+                if job_id is not None:
+                    errors = await process_post_session_job(job_id)
+                    if errors:
+                        logger.warning("Post-session job %s failed stages: %s", job_id, errors)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Post-session worker %s error", index)
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=POST_SESSION_POLL_SECONDS)
+                self._wake.clear()
+            except asyncio.TimeoutError:
+                pass
+
+
+worker_pool = PostSessionWorkerPool()
@@ -1,11 +1,6 @@
-import openai
-import os
-from dotenv import load_dotenv
+from app.services.openai_client import client, call_openai
 
-load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-def generate_profile_summary(transcript: list[dict]) -> str:
+async def generate_profile_summary(transcript: list[dict]) -> str:
     """Generate concise user profile summary from onboarding conversation.
     
     Analyzes onboarding transcript using GPT-4o-mini to extract user's
@@ -20,7 +15,7 @@ def generate_profile_summary(transcript: list[dict]) -> str:
     """
     full_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in transcript])
     
-    response = openai.chat.completions.create(
+    response = await call_openai(lambda: client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[
             {
@@ -33,6 +28,6 @@ def generate_profile_summary(transcript: list[dict]) -> str:
             }
         ],
         temperature=0.3
-    )
+    ))
     
     return response.choices[0].message.content
\ No newline at end of file
@@ -0,0 +1,60 @@
+import json
+import re
+
+# Downlink event types whose body the relay actually reads. Everything else
+# (mostly response.output_audio.delta) is forwarded verbatim without a parse.
+INSPECTED_EVENT_TYPES = frozenset({
+    "response.function_call_arguments.done",
+    "conversation.item.input_audio_transcription.completed",
+    "response.output_audio_transcript.done",
+})
+
+# How far into a message to look for the top-level "type" key
+TYPE_SCAN_LIMIT = 256
+
+_TYPE_PATTERN = re.compile(r'"type"\s*:\s*"([^"\\]+)"')
+
+
+def peek_event_type(message: str) -> str | None:
+    """Read an event's top-level type without decoding the whole payload.
+
+    OpenAI serializes `type` near the start of every Realtime event, so a
+    bounded regex scan is enough. A match is only trusted if no nested
+    object or array opens before it; otherwise this falls back to a full
+    parse.
+
+    Args:
+        message: Raw JSON text of a Realtime event
+
+    Returns:
+        Event type string, or None if the message is not a valid event
+    """
+    match = _TYPE_PATTERN.search(message, 0, TYPE_SCAN_LIMIT)
+    if match and "{" not in message[1:match.start()] and "[" not in message[:match.start()]:
+        return match.group(1)
+
+    try:
+        event = json.loads(message)
+    except json.JSONDecodeError:
+        return None
+    return event.get("type") if isinstance(event, dict) else None
+
+
+def classify_event(message: str) -> tuple[str | None, dict | None]:
+    """Classify a downlink event, decoding it only if the relay needs its body.
+
+    Args:
+        message: Raw JSON text of a Realtime event
+
+    Returns:
+        Tuple of (event type, decoded event). The event is None unless its
+        type is in INSPECTED_EVENT_TYPES.
+    """
+    event_type = peek_event_type(message)
+    if event_type not in INSPECTED_EVENT_TYPES:
+        return event_type, None
+
+    try:
+        return event_type, json.loads(message)
+    except json.JSONDecodeError:
+        return None, None
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+
+import websockets
+
+from app.services.metrics import REALTIME_POOL_CHECKOUTS
+
+# Point at a local mock server for load tests
+REALTIME_URL = os.getenv("OPENAI_REALTIME_URL", "wss://api.openai.com/v1/realtime?model=gpt-realtime")
+
+REALTIME_POOL_ENABLED = os.getenv("REALTIME_POOL_ENABLED", "false").lower() == "true"
+REALTIME_POOL_MIN_SIZE = int(os.getenv("REALTIME_POOL_MIN_SIZE", "0"))
+REALTIME_POOL_MAX_SIZE = int(os.getenv("REALTIME_POOL_MAX_SIZE", "8"))
+# Idle connections older than this are closed rather than handed out
+REALTIME_POOL_MAX_AGE_SECONDS = float(os.getenv("REALTIME_POOL_MAX_AGE_SECONDS", "120"))
+# Arrival rate is measured over this window...
+REALTIME_POOL_RATE_WINDOW_SECONDS = float(os.getenv("REALTIME_POOL_RATE_WINDOW_SECONDS", "60"))
+# ...and the pool holds enough connections for this many seconds of arrivals
+REALTIME_POOL_LEAD_SECONDS = float(os.getenv("REALTIME_POOL_LEAD_SECONDS", "10"))
+REALTIME_POOL_REFILL_SECONDS = float(os.getenv("REALTIME_POOL_REFILL_SECONDS", "1"))
+
+logger = logging.getLogger(__name__)
+
+
+async def connect_realtime():
+    """Open a websocket to the OpenAI Realtime API."""
+    return await websockets.connect(
+        REALTIME_URL,
+        subprotocols=["realtime"],
+        extra_headers={"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}"},
+    )
+
+
+class RealtimeConnectionPool:
+    """Per-worker pool of pre-established upstream Realtime connections.
+
+    Sessions call `acquire` and get a warm connection when one is idle, or a
+    fresh one otherwise. A background task keeps the pool sized to the
+    recent session arrival rate (between min and max size), replaces
+    connections that closed (websockets keepalive pings detect dead peers)
+    and retires ones older than REALTIME_POOL_MAX_AGE_SECONDS.
+    """
+
+    def __init__(
+        self,
+        connect=connect_realtime,
+        enabled: bool = REALTIME_POOL_ENABLED,
+        min_size: int = REALTIME_POOL_MIN_SIZE,
+        max_size: int = REALTIME_POOL_MAX_SIZE,
+        max_age: float = REALTIME_POOL_MAX_AGE_SECONDS,
+    ):
+        self.connect = connect
+        self.enabled = enabled
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_age = max_age
+        self._idle = deque()  # (opened_at, websocket), oldest first
+        self._arrivals = deque()
+        self._task = None
+        self._wake = asyncio.Event()
+
+    def start(self):
+        if self.enabled:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._idle:
+            _, ws = self._idle.popleft()
+            await ws.close()
+
+    def _healthy(self, opened_at: float, ws) -> bool:
+        return ws.open and time.monotonic() - opened_at < self.max_age
+
+    async def acquire(self):
+        """Return an open upstream connection, warm if possible."""
+        if not self.enabled:
+            return await self.connect()
+
+        self._arrivals.append(time.monotonic())
+        self._wake.set()
+        while self._idle:
+            opened_at, ws = self._idle.popleft()
+            if self._healthy(opened_at, ws):
+                REALTIME_POOL_CHECKOUTS.labels("hit").inc()
+                return ws
+            asyncio.create_task(ws.close())
+        REALTIME_POOL_CHECKOUTS.labels("miss").inc()
+        return await self.connect()
+
+    def target_size(self) -> int:
+        """Connections to keep warm for the recent session arrival rate."""
+        cutoff = time.monotonic() - REALTIME_POOL_RATE_WINDOW_SECONDS
+        while self._arrivals and self._arrivals[0] < cutoff:
+            self._arrivals.popleft()
+        rate = len(self._arrivals) / REALTIME_POOL_RATE_WINDOW_SECONDS
+        return max(self.min_size, min(self.max_size, math.ceil(rate * REALTIME_POOL_LEAD_SECONDS)))
+
+    async def _open(self):
+        try:
+            ws = await self.connect()
+        except Exception as e:
+            logger.warning("Realtime pool connect failed: %s", e)
+            return
+        self._idle.append((time.monotonic(), ws))
+
+    async def _maintain(self):
+        while True:
+            # Retire closed and expired connections, plus any beyond the target
+            target = self.target_size()
+            healthy = [entry for entry in self._idle if self._healthy(*entry)]
+            retired = [entry for entry in self._idle if entry not in healthy]
+            retired += healthy[:max(len(healthy) - target, 0)]
+            self._idle = deque(healthy[-target:] if target else [])
+            for _, ws in retired:
+                await ws.close()
+
+            missing = target - len(self._idle)
+            if missing > 0:
+                await asyncio.gather(*(self._open() for _ in range(missing)))
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=REALTIME_POOL_REFILL_SECONDS)
+                self._wake.clear()
+            except asyncio.TimeoutError:
+                pass
+
+
+realtime_pool = RealtimeConnectionPool()
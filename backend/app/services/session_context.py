@@ -0,0 +1,90 @@
+import os
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.database import AsyncSessionLocal
+from app.services.context_cache import context_cache
+from app.services.context_retrieval import format_session, profile_embedding, retrieve_context
+from app.services.voice_store import get_latest_memory_digest, get_open_action_items, get_recent_summaries
+
+# Raw summaries of the latest sessions included next to the memory digest
+MEMORY_DIGEST_RECENT_SESSIONS = int(os.getenv("MEMORY_DIGEST_RECENT_SESSIONS", "3"))
+
+
+async def build_digest_context(db: AsyncSession, user: models.User, digest: models.MemoryDigest) -> str:
+    """Format the memory digest and the last few sessions' summaries.
+
+    Recent sessions already folded into the digest are still listed
+    verbatim, since they matter most for picking up where the user left off.
+    """
+    recent = await get_recent_summaries(db, user.id, MEMORY_DIGEST_RECENT_SESSIONS)
+    recent_text = "".join(format_session(row.created_at, row.summary) for row in reversed(recent))
+    recent_context = f"RECENT SESSIONS:\n{recent_text}\n" if recent_text else ""
+    return f"COACHING MEMORY:\n{digest.content}\n\n" + recent_context
+
+
+async def build_user_context(user: models.User) -> str:
+    """Assemble the profile, history and action item block for a coaching session.
+
+    Opens its own short database sessions, so no connection is held while
+    the profile is embedded for users without a digest.
+
+    Args:
+        user: User starting the session
+
+    Returns:
+        Context string appended to the coaching prompt
+    """
+    # Inject the user profile and conversation history into the prompt for full context at conversation start
+    user_context = (
+        f"USER PROFILE:\n{user.profile_summary}\n\n"
+        if user.profile_summary
+        else ""
+    )
+
+    # Rolling memory digest plus the latest sessions; fall back to retrieving
+    # the most relevant summaries for users without a digest yet
+    async with AsyncSessionLocal() as db:
+        digest = await get_latest_memory_digest(db, user.id)
+        history_context = await build_digest_context(db, user, digest) if digest else None
+
+        # Add action items to the prompt if they exist and are still open
+        action_items = await get_open_action_items(db, user.id)
+
+    if history_context is None:
+        query_embedding = await profile_embedding(user.profile_summary) if user.profile_summary else None
+        async with AsyncSessionLocal() as db:
+            history_context = await retrieve_context(db, user, query_embedding)
+
+    # Turn them into a string to inject into the prompt along with conversation history and user context
+    action_item_text = ""
+    for item in action_items:
+        action_item_text += f"{item.title} | {item.status} | {item.description}\n"
+
+    action_item_context = (
+        f"ACTION ITEMS: \n{action_item_text}"
+        if action_item_text
+        else ""
+    )
+
+    return user_context + history_context + action_item_context
+
+
+async def get_user_context(user: models.User) -> str:
+    """Return the user's context block, from cache when possible.
+
+    Args:
+        user: User starting the session
+
+    Returns:
+        Context string appended to the coaching prompt
+    """
+    context = await context_cache.get(user.id)
+    if context is None:
+        # An invalidation that lands while the context is built means it may be stale; don't cache it
+        generation = await context_cache.generation(user.id)
+        context = await build_user_context(user)
+        if generation is not None:
+            await context_cache.set(user.id, context, generation)
+    return context
@@ -0,0 +1,59 @@
+import os
+import sys
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+# none | console | file; spans are always created, exporting is opt-in
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+# Where the file exporter appends spans, one JSON object per line
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+
+tracer = trace.get_tracer("pono")
+
+_provider = None
+_trace_file = None
+
+
+def configure_tracing():
+    """Install the span exporter chosen by TRACING_EXPORTER (no-op for "none")."""
+    global _provider, _trace_file
+    if _provider is not None or TRACING_EXPORTER == "none":
+        return
+
+    if TRACING_EXPORTER == "file":
+        _trace_file = open(TRACING_FILE, "a")
+        exporter = ConsoleSpanExporter(out=_trace_file, formatter=lambda span: span.to_json(indent=None) + "\n")
+    elif TRACING_EXPORTER == "console":
+        exporter = ConsoleSpanExporter(out=sys.stdout)
+    else:
+        raise ValueError(f"Unknown TRACING_EXPORTER: {TRACING_EXPORTER}")
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": "pono-api"}))
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+
+
+def shutdown_tracing():
+    """Flush buffered spans on shutdown and close the trace file."""
+    global _provider, _trace_file
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+    if _trace_file is not None:
+        _trace_file.close()
+        _trace_file = None
+
+
+def inject_context() -> dict:
+    """Serialize the current trace context, e.g. into a queued job's payload."""
+    carrier = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+def extract_context(carrier: dict | None):
+    """Restore a trace context saved by `inject_context` (None starts a new trace)."""
+    return propagate.extract(carrier) if carrier else None
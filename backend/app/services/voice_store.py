@@ -0,0 +1,101 @@
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+
+# Messages per multi-row INSERT; 4 bind parameters each, well under Postgres' 32767
+MESSAGE_INSERT_BATCH = 1000
+
+
+async def get_user(db: AsyncSession, user_id: int) -> models.User | None:
+    """Fetch a user by ID."""
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    return result.scalar_one_or_none()
+
+
+async def create_conversation(db: AsyncSession, user_id: int) -> models.Conversation:
+    """Insert an empty conversation record for a new session."""
+    conversation = models.Conversation(user_id=user_id)
+    db.add(conversation)
+    await db.commit()
+    await db.refresh(conversation)
+    return conversation
+
+
+async def save_transcript(db: AsyncSession, conversation_id: int, duration: int, title: str, messages: list[dict]):
+    """Insert all of a session's messages and set the conversation's metadata in one statement.
+
+    The messages go in as a single multi-row INSERT inside a data-modifying
+    CTE attached to the conversation UPDATE, so close-out costs one round
+    trip for up to MESSAGE_INSERT_BATCH messages. Not committed here.
+
+    Args:
+        db: Async database session
+        conversation_id: Conversation the messages belong to
+        duration: Session length in seconds
+        title: Conversation title
+        messages: {"role", "content"} dicts with already encrypted content
+    """
+    rows = [{"conversation_id": conversation_id, "role": m["role"], "content": m["content"]} for m in messages]
+    batches = [rows[i:i + MESSAGE_INSERT_BATCH] for i in range(0, len(rows), MESSAGE_INSERT_BATCH)]
+
+    statement = update(models.Conversation).where(models.Conversation.id == conversation_id).values(duration=duration, title=title)
+    if batches:
+        statement = statement.add_cte(insert(models.Message).values(batches[0]).cte("inserted_messages"))
+    await db.execute(statement)
+    # Only very long sessions spill past one batch (bind parameter limit)
+    for batch in batches[1:]:
+        await db.execute(insert(models.Message).values(batch))
+
+
+async def get_recent_summaries(db: AsyncSession, user_id: int, limit: int) -> list:
+    """Return (id, created_at, summary) rows for a user's latest summarized conversations, newest first."""
+    result = await db.execute(
+        select(models.Conversation.id, models.Conversation.created_at, models.Conversation.summary)
+        .where(
+            models.Conversation.user_id == user_id,
+            models.Conversation.summary.isnot(None),
+        )
+        .order_by(models.Conversation.created_at.desc(), models.Conversation.id.desc())
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def get_latest_memory_digest(db: AsyncSession, user_id: int) -> models.MemoryDigest | None:
+    """Return the user's current memory digest, if one has been built."""
+    result = await db.execute(
+        select(models.MemoryDigest)
+        .where(models.MemoryDigest.user_id == user_id)
+        .order_by(models.MemoryDigest.version.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_open_action_items(db: AsyncSession, user_id: int) -> list[models.ActionItem]:
+    """Return a user's open action items."""
+    result = await db.execute(
+        select(models.ActionItem).where(
+            models.ActionItem.user_id == user_id,
+            models.ActionItem.status == 'open',
+        )
+    )
+    return list(result.scalars().all())
+
+
+async def create_action_item(db: AsyncSession, user_id: int, title: str, description: str, status: str) -> models.ActionItem:
+    """Insert an action item created by the model's tool call."""
+    item = models.ActionItem(
+        user_id=user_id,
+        title=title,
+        description=description,
+        status=status,
+        created_at=datetime.now(),
+    )
+    db.add(item)
+    await db.commit()
+    await db.refresh(item)
+    return item
@@ -0,0 +1,165 @@
+"""Local stand-in for the OpenAI Realtime websocket.
+
+Speaks enough of the protocol for /ws/voice to run end to end without a
+network: it acknowledges session.update, counts incoming user audio and,
+for every TURN_SECONDS of it, plays out a scripted turn (speech
+started/stopped, user transcription, assistant audio at real-time pace,
+assistant transcript). Every Nth turn ends in a create_action_item tool
+call instead, answered by a short follow-up response once the relay sends
+response.create.
+
+Audio deltas carry their send time in `event_id` (evt_<time_ns>) so the
+load generator can measure relay latency on the same host.
+
+Usage:
+    python -m loadtest.mock_realtime --port 9100
+    OPENAI_REALTIME_URL=ws://127.0.0.1:9100 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import time
+
+import websockets
+
+SAMPLE_RATE = 24000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+# Assistant audio is streamed in chunks of this size, like the real API
+DELTA_MS = 100
+
+USER_LINES = [
+    "I had a really hard week at work and I could not focus on anything.",
+    "I keep putting off the conversation with my manager about my workload.",
+    "Honestly I think I am just tired of feeling behind all the time.",
+]
+ASSISTANT_LINES = [
+    "That sounds exhausting. What part of the week felt heaviest for you?",
+    "It makes sense to hesitate. What would a good outcome of that conversation look like?",
+    "Feeling behind is draining. Let's pick one small thing you can finish this week.",
+]
+
+
+class MockRealtimeSession:
+    """One upstream connection's worth of scripted Realtime behaviour."""
+
+    def __init__(self, ws, turn_seconds: float, response_seconds: float, tool_every: int):
+        self.ws = ws
+        self.turn_bytes = int(turn_seconds * BYTES_PER_SECOND)
+        self.response_seconds = response_seconds
+        self.tool_every = tool_every
+        self.pending_bytes = 0
+        self.received_bytes = 0
+        self.turns = itertools.count(1)
+        self.ids = itertools.count(1)
+        self._speaking = asyncio.Lock()
+        self._tasks = set()
+
+    async def send(self, event: dict):
+        await self.ws.send(json.dumps(event))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run(self):
+        await self.send({"type": "session.created", "event_id": f"evt_{time.time_ns()}", "session": {"type": "realtime"}})
+        try:
+            async for message in self.ws:
+                event = json.loads(message)
+                event_type = event.get("type")
+                if event_type == "session.update":
+                    await self.send({"type": "session.updated", "event_id": f"evt_{time.time_ns()}", "session": event.get("session", {})})
+                elif event_type == "input_audio_buffer.append":
+                    size = len(base64.b64decode(event.get("audio", "")))
+                    self.pending_bytes += size
+                    self.received_bytes += size
+                    if self.pending_bytes >= self.turn_bytes:
+                        # The whole turn counts as speech, timed against the audio received so far
+                        end_ms = self.received_bytes * 1000 // BYTES_PER_SECOND
+                        start_ms = end_ms - self.pending_bytes * 1000 // BYTES_PER_SECOND
+                        self.pending_bytes = 0
+                        self._spawn(self.play_turn(next(self.turns), start_ms, end_ms))
+                elif event_type == "response.create":
+                    self._spawn(self.play_response(self.response_seconds / 2, "Great, I've added that to your action items."))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+    async def play_turn(self, turn: int, start_ms: int, end_ms: int):
+        item_id = f"item_{next(self.ids)}"
+        await self.send({
+            "type": "input_audio_buffer.speech_started",
+            "event_id": f"evt_{time.time_ns()}",
+            "item_id": item_id,
+            "audio_start_ms": start_ms,
+        })
+        await self.send({
+            "type": "input_audio_buffer.speech_stopped",
+            "event_id": f"evt_{time.time_ns()}",
+            "item_id": item_id,
+            "audio_end_ms": end_ms,
+        })
+        await self.send({
+            "type": "conversation.item.input_audio_transcription.completed",
+            "event_id": f"evt_{time.time_ns()}",
+            "item_id": item_id,
+            "transcript": USER_LINES[turn % len(USER_LINES)],
+        })
+        if self.tool_every and turn % self.tool_every == 0:
+            await self.send({
+                "type": "response.function_call_arguments.done",
+                "event_id": f"evt_{time.time_ns()}",
+                "call_id": f"call_{next(self.ids)}",
+                "name": "create_action_item",
+                "arguments": json.dumps({
+                    "title": "Talk to manager",
+                    "description": "Book 20 minutes to discuss workload.",
+                    "status": "open",
+                }),
+            })
+            return
+        await self.play_response(self.response_seconds, ASSISTANT_LINES[turn % len(ASSISTANT_LINES)])
+
+    async def play_response(self, seconds: float, text: str):
+        """Stream assistant audio at real-time pace, then its transcript."""
+        async with self._speaking:
+            chunk = base64.b64encode(os.urandom(BYTES_PER_SECOND * DELTA_MS // 1000)).decode()
+            started = time.monotonic()
+            for i in range(int(seconds * 1000 / DELTA_MS)):
+                await self.send({"type": "response.output_audio.delta", "event_id": f"evt_{time.time_ns()}", "delta": chunk})
+                await asyncio.sleep(max(started + (i + 1) * DELTA_MS / 1000 - time.monotonic(), 0))
+            await self.send({"type": "response.output_audio_transcript.done", "event_id": f"evt_{time.time_ns()}", "transcript": text})
+            await self.send({"type": "response.done", "event_id": f"evt_{time.time_ns()}"})
+
+
+async def serve(host: str, port: int, turn_seconds: float, response_seconds: float, tool_every: int):
+    async def handler(ws):
+        await MockRealtimeSession(ws, turn_seconds, response_seconds, tool_every).run()
+
+    async with websockets.serve(handler, host, port, max_size=None):
+        print(f"Mock Realtime server listening on ws://{host}:{port}")
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI Realtime websocket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--turn-seconds", type=float, default=4, help="User audio per simulated turn")
+    parser.add_argument("--response-seconds", type=float, default=3, help="Assistant audio per response")
+    parser.add_argument("--tool-every", type=int, default=4, help="Every Nth turn is a tool call (0 disables)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.turn_seconds, args.response_seconds, args.tool_every))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Concurrent-session load test for /ws/voice.
+
+Opens N authenticated client sessions that stream PCM16 at real-time pace
+(the same 128-sample frames the browser AudioWorklet sends) and reports:
+
+- connect latency and downlink relay latency percentiles (mock Realtime
+  send time -> client receive time, read from each audio delta's event_id)
+- server event-loop lag percentiles (from loadtest.serve's lag log)
+- server CPU seconds and peak resident memory per session (from /proc,
+  sampled every RSS_SAMPLE_SECONDS while the sessions run)
+
+With --spawn it starts loadtest.mock_realtime and loadtest.serve itself, so
+the only external dependency is the Postgres database in DATABASE_URL and
+the users given by --user-id. Thresholds (--max-relay-p99-ms,
+--max-loop-lag-p99-ms) make the run exit non-zero, for use as a regression
+gate.
+
+Usage:
+    python -m loadtest.run --spawn --sessions 50 --duration 60 --user-id 1
+"""
+import argparse
+import asyncio
+import base64
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import websockets
+
+from app.services.security import create_access_token
+
+SAMPLE_RATE = 24000
+BYTES_PER_SAMPLE = 2
+# Send every due frame on this tick rather than sleeping per 5 ms frame
+SEND_TICK_SECONDS = 0.02
+# How often the server's resident memory is sampled during the run
+RSS_SAMPLE_SECONDS = 1.0
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return round(ordered[index], 2)
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": round(max(values), 2) if values else None,
+    }
+
+
+class LoadStats:
+    def __init__(self):
+        self.connect_ms = []
+        self.relay_ms = []
+        self.events_in = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.completed = 0
+        self.failed = 0
+        self.errors = {}
+        self.peak_rss_mb = None
+
+    def fail(self, error: Exception):
+        self.failed += 1
+        key = type(error).__name__
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+async def receive_events(ws, stats: LoadStats):
+    async for message in ws:
+        received = time.time_ns()
+        stats.events_in += 1
+        stats.bytes_in += len(message)
+        if isinstance(message, bytes) or '"response.output_audio.delta"' not in message[:64]:
+            continue
+        event_id = json.loads(message).get("event_id", "")
+        if event_id.startswith("evt_"):
+            stats.relay_ms.append((received - int(event_id[4:])) / 1e6)
+
+
+async def run_session(url: str, token: str, duration: float, frame_samples: int, binary: bool, stats: LoadStats):
+    frame = os.urandom(frame_samples * BYTES_PER_SAMPLE)
+    if not binary:
+        frame = json.dumps({"type": "input_audio_buffer.append", "audio": base64.b64encode(frame).decode()})
+    frame_seconds = frame_samples / SAMPLE_RATE
+    total_frames = int(duration / frame_seconds)
+
+    try:
+        started = time.monotonic()
+        async with websockets.connect(f"{url}?token={token}", max_size=None) as ws:
+            stats.connect_ms.append((time.monotonic() - started) * 1000)
+            receiver = asyncio.create_task(receive_events(ws, stats))
+            streaming_started = time.monotonic()
+            sent = 0
+            while sent < total_frames and not receiver.done():
+                due = min(int((time.monotonic() - streaming_started) / frame_seconds) + 1, total_frames)
+                for _ in range(due - sent):
+                    await ws.send(frame)
+                    stats.bytes_out += len(frame)
+                sent = due
+                await asyncio.sleep(SEND_TICK_SECONDS)
+            receiver.cancel()
+        stats.completed += 1
+    except Exception as e:
+        stats.fail(e)
+
+
+def read_process(pid: int) -> tuple[float, float]:
+    """(CPU seconds, resident MB) of a local process, from /proc."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    with open(f"/proc/{pid}/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    return cpu_seconds, rss_kb / 1024
+
+
+async def sample_rss(pid: int, stats: LoadStats):
+    """Track the server's peak resident memory until cancelled."""
+    while True:
+        rss_mb = read_process(pid)[1]
+        stats.peak_rss_mb = max(stats.peak_rss_mb or 0, rss_mb)
+        await asyncio.sleep(RSS_SAMPLE_SECONDS)
+
+
+def read_lag_log(path: str, since: float, until: float) -> list[float]:
+    samples = []
+    with open(path) as f:
+        for line in f:
+            entry = json.loads(line)
+            if since <= entry["t"] <= until:
+                samples += entry["lag_ms"]
+    return samples
+
+
+def wait_for_port(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout}s")
+
+
+def spawn_servers(app_port: int, mock_port: int, lag_log: str) -> list[subprocess.Popen]:
+    env = dict(os.environ, OPENAI_REALTIME_URL=f"ws://127.0.0.1:{mock_port}")
+    mock = subprocess.Popen([sys.executable, "-m", "loadtest.mock_realtime", "--port", str(mock_port)], env=env)
+    wait_for_port(mock_port)
+    app = subprocess.Popen([sys.executable, "-m", "loadtest.serve", "--port", str(app_port), "--lag-log", lag_log], env=env)
+    wait_for_port(app_port)
+    return [app, mock]
+
+
+async def run_load(args, stats: LoadStats):
+    tokens = [create_access_token({"sub": str(user_id)}) for user_id in args.user_id]
+    sampler = asyncio.create_task(sample_rss(args.server_pid, stats)) if args.server_pid else None
+    tasks = []
+    for i in range(args.sessions):
+        tasks.append(asyncio.create_task(run_session(
+            args.url, tokens[i % len(tokens)], args.duration, args.frame_samples, not args.json_audio, stats,
+        )))
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.sessions)
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        if sampler is not None:
+            sampler.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /ws/voice load test")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws/voice")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of audio each session streams")
+    parser.add_argument("--ramp", type=float, default=5, help="Seconds over which sessions are started")
+    parser.add_argument("--user-id", type=int, action="append", help="User to authenticate as (repeatable, default 1)")
+    parser.add_argument("--frame-samples", type=int, default=128, help="Samples per uplink frame")
+    parser.add_argument("--json-audio", action="store_true", help="Send base64 JSON appends instead of binary frames")
+    parser.add_argument("--spawn", action="store_true", help="Start the mock Realtime server and the API locally")
+    parser.add_argument("--app-port", type=int, default=8000)
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--server-pid", type=int, help="PID of an already running API, for CPU and memory")
+    parser.add_argument("--lag-log", help="Lag log written by an already running loadtest.serve")
+    parser.add_argument("--output", help="Also write the report as JSON to this file")
+    parser.add_argument("--max-relay-p99-ms", type=float, help="Fail if relay latency p99 exceeds this")
+    parser.add_argument("--max-loop-lag-p99-ms", type=float, help="Fail if server event-loop lag p99 exceeds this")
+    args = parser.parse_args()
+    args.user_id = args.user_id or [1]
+
+    processes = []
+    if args.spawn:
+        args.url = f"ws://127.0.0.1:{args.app_port}/ws/voice"
+        args.lag_log = tempfile.mkstemp(prefix="pono-lag-", suffix=".jsonl")[1]
+        processes = spawn_servers(args.app_port, args.mock_port, args.lag_log)
+        args.server_pid = processes[0].pid
+
+    stats = LoadStats()
+    try:
+        before = read_process(args.server_pid) if args.server_pid else None
+        started = time.time()
+        asyncio.run(run_load(args, stats))
+        finished = time.time()
+        after = read_process(args.server_pid) if args.server_pid else None
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    elapsed = finished - started
+    report = {
+        "sessions": args.sessions,
+        "completed": stats.completed,
+        "failed": stats.failed,
+        "errors": stats.errors,
+        "elapsed_seconds": round(elapsed, 1),
+        "connect_ms": summarize(stats.connect_ms),
+        "relay_latency_ms": summarize(stats.relay_ms),
+        "downlink_events_per_second": round(stats.events_in / elapsed, 1),
+        "downlink_bytes_per_second": round(stats.bytes_in / elapsed),
+        "uplink_bytes_per_second": round(stats.bytes_out / elapsed),
+    }
+    if args.lag_log:
+        report["event_loop_lag_ms"] = summarize(read_lag_log(args.lag_log, started, finished))
+    if before and after:
+        report["server_cpu_percent"] = round((after[0] - before[0]) / elapsed * 100, 1)
+        report["server_cpu_seconds_per_session"] = round((after[0] - before[0]) / args.sessions, 3)
+        peak_rss_mb = max(stats.peak_rss_mb or 0, after[1])
+        report["server_rss_mb_peak"] = round(peak_rss_mb, 1)
+        report["server_rss_mb_per_session"] = round((peak_rss_mb - before[1]) / args.sessions, 2)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    relay_p99 = report["relay_latency_ms"]["p99"]
+    if args.max_relay_p99_ms is not None and (relay_p99 is None or relay_p99 > args.max_relay_p99_ms):
+        failures.append(f"relay latency p99 {relay_p99} ms > {args.max_relay_p99_ms} ms")
+    lag_p99 = report.get("event_loop_lag_ms", {}).get("p99")
+    if args.max_loop_lag_p99_ms is not None and (lag_p99 is None or lag_p99 > args.max_loop_lag_p99_ms):
+        failures.append(f"event-loop lag p99 {lag_p99} ms > {args.max_loop_lag_p99_ms} ms")
+    if stats.failed:
+        failures.append(f"{stats.failed} sessions failed")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
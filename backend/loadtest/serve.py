@@ -0,0 +1,56 @@
+"""Run the API under uvicorn with an event-loop lag probe for load tests.
+
+The probe sleeps LAG_INTERVAL_SECONDS in a loop and records how late each
+wakeup is; once a second the samples are appended to --lag-log as a JSON
+line ({"t": unix time, "lag_ms": [...]}) for loadtest.run to read.
+
+Usage:
+    python -m loadtest.serve --port 8000 --lag-log /tmp/pono-lag.jsonl
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import uvicorn
+
+LAG_INTERVAL_SECONDS = 0.05
+
+
+async def probe_event_loop_lag(path: str):
+    loop = asyncio.get_running_loop()
+    samples = []
+    flushed_at = loop.time()
+    with open(path, "a") as log:
+        while True:
+            expected = loop.time() + LAG_INTERVAL_SECONDS
+            await asyncio.sleep(LAG_INTERVAL_SECONDS)
+            samples.append(round(max(loop.time() - expected, 0) * 1000, 2))
+            if loop.time() - flushed_at >= 1:
+                log.write(json.dumps({"t": time.time(), "lag_ms": samples}) + "\n")
+                log.flush()
+                samples = []
+                flushed_at = loop.time()
+
+
+async def serve(host: str, port: int, lag_log: str | None):
+    server = uvicorn.Server(uvicorn.Config("app.main:app", host=host, port=port, log_level="warning"))
+    probe = asyncio.create_task(probe_event_loop_lag(lag_log)) if lag_log else None
+    try:
+        await server.serve()
+    finally:
+        if probe:
+            probe.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API with an event-loop lag probe")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--lag-log", help="Append per-second event-loop lag samples to this file")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.lag_log))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import asyncio
+import base64
+import json
+
+from app.services.audio_coalescer import AudioCoalescer, wrap_audio_append
+
+
+def _coalescer(frame_ms: int):
+    sent = []
+
+    async def send(data):
+        sent.append(data)
+
+    return AudioCoalescer(send, frame_ms), sent
+
+
+def _audio(event: str) -> bytes:
+    decoded = json.loads(event)
+    assert decoded["type"] == "input_audio_buffer.append"
+    return base64.b64decode(decoded["audio"])
+
+
+def test_append_event_round_trips_the_audio():
+    assert _audio(wrap_audio_append(b"\x01\x02\x03\x04")) == b"\x01\x02\x03\x04"
+
+
+def test_chunks_are_held_until_a_full_frame_is_buffered():
+    coalescer, sent = _coalescer(10)  # 480 bytes at 24 kHz PCM16
+
+    async def scenario():
+        await coalescer.append(b"\x01" * 200)
+        assert sent == []
+        await coalescer.append(b"\x02" * 300)
+
+    asyncio.run(scenario())
+    assert [_audio(event) for event in sent] == [b"\x01" * 200 + b"\x02" * 300]
+
+
+def test_control_events_go_out_after_the_audio_before_them():
+    coalescer, sent = _coalescer(40)
+
+    async def scenario():
+        await coalescer.append(b"\x01" * 100)
+        await coalescer.send_event('{"type": "response.create"}')
+
+    asyncio.run(scenario())
+    assert _audio(sent[0]) == b"\x01" * 100
+    assert sent[1:] == ['{"type": "response.create"}']
+
+
+def test_timer_flushes_a_partial_frame_once_it_is_old_enough():
+    coalescer, sent = _coalescer(20)
+
+    async def scenario():
+        timer = asyncio.create_task(coalescer.run_timer())
+        await coalescer.append(b"\x01" * 100)
+        await asyncio.sleep(0.005)
+        assert sent == []
+        await asyncio.sleep(0.05)
+        timer.cancel()
+
+    asyncio.run(scenario())
+    assert [_audio(event) for event in sent] == [b"\x01" * 100]
+
+
+def test_zero_frame_forwards_every_chunk():
+    coalescer, sent = _coalescer(0)
+
+    async def scenario():
+        await coalescer.run_timer()  # returns at once: nothing is ever held
+        await coalescer.append(b"\x01\x02")
+        await coalescer.append(b"\x03\x04")
+
+    asyncio.run(scenario())
+    assert [_audio(event) for event in sent] == [b"\x01\x02", b"\x03\x04"]
+
+
+def test_flush_with_nothing_buffered_sends_nothing():
+    coalescer, sent = _coalescer(40)
+    asyncio.run(coalescer.flush())
+    assert sent == []
@@ -0,0 +1,93 @@
+import pytest
+
+from app.services.audio_recorder import BYTES_PER_SECOND, SessionAudioRecorder
+
+
+def _pcm(first: int, count: int) -> bytes:
+    """`count` bytes whose values count up from `first`, so any slice is recognizable."""
+    return bytes((first + i) % 256 for i in range(count))
+
+
+def test_spill_mode_keeps_everything_in_memory_until_full():
+    with SessionAudioRecorder("spill", 1) as recorder:
+        recorder.write(_pcm(0, BYTES_PER_SECOND // 2))
+        recorder.write(_pcm(BYTES_PER_SECOND // 2, BYTES_PER_SECOND // 2))
+
+        assert not recorder.spilled
+        assert recorder.duration == 1.0
+        assert bytes(recorder.window()) == _pcm(0, BYTES_PER_SECOND)
+
+
+def test_spill_mode_moves_to_a_file_and_serves_windows_across_the_boundary():
+    with SessionAudioRecorder("spill", 1) as recorder:
+        recorder.write(_pcm(0, BYTES_PER_SECOND))
+        recorder.write(_pcm(BYTES_PER_SECOND, BYTES_PER_SECOND))
+
+        assert recorder.spilled
+        assert recorder.duration == 2.0
+        assert bytes(recorder.window(0.5, 1.0)) == _pcm(BYTES_PER_SECOND // 2, BYTES_PER_SECOND)
+
+
+def test_spilled_recording_remaps_after_it_grows():
+    with SessionAudioRecorder("spill", 1) as recorder:
+        recorder.write(_pcm(0, 2 * BYTES_PER_SECOND))
+        assert bytes(recorder.window(1.0)) == _pcm(BYTES_PER_SECOND, BYTES_PER_SECOND)
+
+        recorder.write(_pcm(2 * BYTES_PER_SECOND, BYTES_PER_SECOND))
+        assert bytes(recorder.window(2.0)) == _pcm(2 * BYTES_PER_SECOND, BYTES_PER_SECOND)
+
+
+def test_views_taken_before_a_spill_stay_valid():
+    with SessionAudioRecorder("spill", 1) as recorder:
+        recorder.write(_pcm(0, BYTES_PER_SECOND))
+        view = recorder.window(0, 0.5)
+        recorder.write(_pcm(BYTES_PER_SECOND, 2))
+
+        assert recorder.spilled
+        assert bytes(view) == _pcm(0, BYTES_PER_SECOND // 2)
+
+
+def test_ring_mode_keeps_only_the_most_recent_audio():
+    with SessionAudioRecorder("ring", 1) as recorder:
+        for second in range(3):
+            recorder.write(_pcm(second * BYTES_PER_SECOND, BYTES_PER_SECOND))
+
+        assert recorder.duration == 3.0
+        assert recorder.retained_from == 2.0
+        assert bytes(recorder.window()) == _pcm(2 * BYTES_PER_SECOND, BYTES_PER_SECOND)
+        # Anything older than what is held is clipped away
+        assert bytes(recorder.window(0, 2.0)) == b""
+
+
+def test_ring_window_that_wraps_the_buffer_end_is_copied_in_order():
+    with SessionAudioRecorder("ring", 1) as recorder:
+        recorder.write(_pcm(0, BYTES_PER_SECOND))
+        recorder.write(_pcm(BYTES_PER_SECOND, BYTES_PER_SECOND // 2))
+
+        window = recorder.window(0.5, 1.0)
+        assert isinstance(window, bytes)
+        assert window == _pcm(BYTES_PER_SECOND // 2, BYTES_PER_SECOND)
+
+
+def test_ring_write_of_a_chunk_larger_than_the_buffer_keeps_its_tail():
+    with SessionAudioRecorder("ring", 1) as recorder:
+        recorder.write(_pcm(0, BYTES_PER_SECOND // 4))
+        recorder.write(_pcm(BYTES_PER_SECOND // 4, 2 * BYTES_PER_SECOND))
+
+        end = BYTES_PER_SECOND // 4 + 2 * BYTES_PER_SECOND
+        assert recorder.bytes_written == end
+        assert bytes(recorder.window(recorder.retained_from)) == _pcm(end - BYTES_PER_SECOND, BYTES_PER_SECOND)
+
+
+def test_windows_start_on_a_sample_boundary():
+    with SessionAudioRecorder("spill", 1) as recorder:
+        recorder.write(_pcm(0, BYTES_PER_SECOND))
+        # 1/3 s is not a whole number of bytes; the window must not split a sample
+        assert len(recorder.window(1 / 3, 0.1)) % 2 == 0
+
+
+def test_invalid_configuration_is_rejected():
+    with pytest.raises(ValueError):
+        SessionAudioRecorder("tape", 1)
+    with pytest.raises(ValueError):
+        SessionAudioRecorder("ring", 0)
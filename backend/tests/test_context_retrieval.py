@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.services import context_retrieval
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def execute(self, statement):
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+def _row(id, days_ago, distance, summary=None):
+    return SimpleNamespace(
+        id=id, created_at=datetime.utcnow() - timedelta(days=days_ago), summary=summary or f"summary {id}", distance=distance
+    )
+
+
+def _retrieve(rows, query_embedding=(1.0,), token_budget=10):
+    user = SimpleNamespace(id=1)
+    return asyncio.run(context_retrieval.retrieve_context(_Rows(rows), user, list(query_embedding), token_budget))
+
+
+def test_unembedded_session_does_not_outrank_relevant_ones_on_recency_alone():
+    # A highly relevant session from two weeks ago vs. today's session whose embedding failed
+    relevant, unembedded = _row(1, 14, 0.1, "relevant one"), _row(2, 0, None, "unembedded")
+
+    context = _retrieve([relevant, unembedded], token_budget=10)
+
+    assert "relevant one" in context and "unembedded" not in context
+
+
+def test_unembedded_session_scores_neutral_relevance():
+    # Same age: neutral relevance beats a poor match and loses to a good one
+    poor, unembedded, good = _row(1, 0, 1.8, "poor match"), _row(2, 0, None, "unembedded"), _row(3, 0, 0.2, "good match")
+
+    context = _retrieve([poor, unembedded, good], token_budget=20)
+
+    assert "good match" in context and "unembedded" in context and "poor match" not in context
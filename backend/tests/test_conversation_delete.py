@@ -0,0 +1,122 @@
+import asyncio
+from types import SimpleNamespace
+
+import anyio
+
+from app import models
+from app.api import conversations
+from app.services import memory_digest, post_session, session_context
+from app.services.context_cache import context_cache
+
+
+class _FakeQuery:
+    def __init__(self, session, model):
+        self.session = session
+        self.model = model
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def first(self):
+        if self.model is models.Conversation:
+            return self.session.conversation
+        if self.model is models.PostSessionJob:
+            return self.session.waiting_rebuild
+        return self.session.digest
+
+    def delete(self, synchronize_session=None):
+        self.session.deleted.append(self.model)
+
+
+class _FakeSession:
+    def __init__(self, conversation, digest=None, waiting_rebuild=None):
+        self.conversation = conversation
+        self.digest = digest
+        self.waiting_rebuild = waiting_rebuild
+        self.deleted = []
+        self.added = []
+        self.committed = False
+
+    def query(self, model):
+        return _FakeQuery(self, model)
+
+    def delete(self, obj):
+        self.deleted.append(obj)
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def commit(self):
+        self.committed = True
+
+
+def _delete(conversation, user, db):
+    async def scenario():
+        # Sync routes run in a worker thread, where from_thread.run is available
+        await anyio.to_thread.run_sync(conversations.delete_conversation, conversation.id, user, db)
+
+    asyncio.run(scenario())
+
+
+def test_delete_conversation_drops_cached_context(monkeypatch):
+    user = SimpleNamespace(id=42)
+    conversation = SimpleNamespace(id=7, user_id=42, summary="Talked about the deleted topic")
+    db = _FakeSession(conversation)
+
+    async def build_user_context(user):
+        return "fresh context"
+
+    monkeypatch.setattr(session_context, "build_user_context", build_user_context)
+    asyncio.run(context_cache.set(user.id, f"HISTORY:\n{conversation.summary}"))
+
+    _delete(conversation, user, db)
+
+    assert asyncio.run(session_context.get_user_context(user)) == "fresh context"
+    assert db.deleted == [conversation] and db.committed
+
+
+def test_delete_folded_conversation_discards_digest_and_queues_rebuild():
+    user = SimpleNamespace(id=42)
+    conversation = SimpleNamespace(id=7, user_id=42)
+    db = _FakeSession(conversation, SimpleNamespace(conversation_ids=[3, 7, 9]))
+
+    _delete(conversation, user, db)
+
+    assert models.MemoryDigest in db.deleted
+    job, = db.added
+    assert job.user_id == 42 and job.conversation_id is None
+    assert job.payload["stages"] == [post_session.DIGEST_REBUILD_STAGE]
+
+
+def test_delete_does_not_queue_a_second_waiting_rebuild():
+    user = SimpleNamespace(id=42)
+    conversation = SimpleNamespace(id=7, user_id=42)
+    db = _FakeSession(conversation, SimpleNamespace(conversation_ids=[3, 7, 9]), waiting_rebuild=object())
+
+    _delete(conversation, user, db)
+
+    assert models.MemoryDigest in db.deleted
+    assert not db.added
+
+
+def test_delete_unfolded_conversation_keeps_digest():
+    user = SimpleNamespace(id=42)
+    conversation = SimpleNamespace(id=10, user_id=42)
+    db = _FakeSession(conversation, SimpleNamespace(conversation_ids=[3, 7, 9]))
+
+    _delete(conversation, user, db)
+
+    assert models.MemoryDigest not in db.deleted
+    assert not db.added
+
+
+def test_tracked_ids_are_bounded(monkeypatch):
+    monkeypatch.setattr(memory_digest, "MEMORY_DIGEST_TRACKED_IDS", 3)
+    assert memory_digest._track([1, 2, 3, 4, 5]) == [3, 4, 5]
+    # Once the list is full, conversations older than it are assumed folded
+    digest = SimpleNamespace(conversation_ids=[3, 4, 5])
+    assert memory_digest.may_include(digest, 1)
+    assert not memory_digest.may_include(digest, 6)
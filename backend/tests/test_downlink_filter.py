@@ -0,0 +1,81 @@
+import json
+
+from app.services.downlink_filter import DownlinkFilter, _load_allowlist
+
+ALLOWLIST = frozenset({"response.output_audio.delta", "conversation.item.created", "error"})
+
+
+def _apply(downlink: DownlinkFilter, event: dict) -> dict | None:
+    message = json.dumps(event)
+    forwarded = downlink.apply(event["type"], message)
+    return None if forwarded is None else json.loads(forwarded)
+
+
+def test_events_outside_the_allowlist_are_dropped_and_counted():
+    downlink = DownlinkFilter(ALLOWLIST)
+    message = json.dumps({"type": "response.output_audio_transcript.delta", "delta": "Hi"})
+
+    assert downlink.apply("response.output_audio_transcript.delta", message) is None
+    assert downlink.stats["response.output_audio_transcript.delta"]["dropped"] == 1
+    assert downlink.totals() == (1, len(message))
+
+
+def test_audio_deltas_are_forwarded_verbatim():
+    downlink = DownlinkFilter(ALLOWLIST)
+    message = json.dumps({"type": "response.output_audio.delta", "event_id": "evt_1", "delta": "AAAA"})
+
+    assert downlink.apply("response.output_audio.delta", message) is message
+
+
+def test_item_created_keeps_only_role_and_transcripts():
+    event = {
+        "type": "conversation.item.created",
+        "event_id": "evt_1",
+        "item": {
+            "id": "item_1",
+            "role": "user",
+            "status": "completed",
+            "content": [{"type": "input_audio", "transcript": "Hello"}, {"type": "input_audio", "transcript": None}],
+        },
+    }
+
+    assert _apply(DownlinkFilter(ALLOWLIST), event) == {
+        "type": "conversation.item.created",
+        "item": {"role": "user", "content": [{"transcript": "Hello"}]},
+    }
+
+
+def test_item_created_without_transcripts_is_dropped():
+    event = {"type": "conversation.item.created", "item": {"role": "assistant", "content": [{"type": "audio"}]}}
+    downlink = DownlinkFilter(ALLOWLIST)
+
+    assert _apply(downlink, event) is None
+    assert downlink.stats["conversation.item.created"]["dropped"] == 1
+
+
+def test_error_keeps_only_message_and_code():
+    event = {"type": "error", "event_id": "evt_1", "error": {"type": "invalid_request_error", "code": "bad", "message": "No", "param": None}}
+
+    assert _apply(DownlinkFilter(ALLOWLIST), event) == {"type": "error", "error": {"message": "No", "code": "bad"}}
+
+
+def test_projection_can_be_turned_off():
+    event = {"type": "error", "event_id": "evt_1", "error": {"code": "bad", "message": "No"}}
+
+    assert _apply(DownlinkFilter(ALLOWLIST, projection=False), event) == event
+
+
+def test_summary_reports_bytes_saved():
+    downlink = DownlinkFilter(ALLOWLIST)
+    _apply(downlink, {"type": "error", "event_id": "evt_1", "error": {"code": "bad", "message": "No", "param": "x" * 50}})
+    summary = downlink.summary()
+
+    assert summary["bytes_saved"] == summary["bytes_in"] - summary["bytes_out"] > 0
+    assert summary["by_type"]["error"]["forwarded"] == 1
+
+
+def test_allowlist_setting(monkeypatch):
+    monkeypatch.setenv("DOWNLINK_EVENT_ALLOWLIST", "*")
+    assert _load_allowlist() is None
+    monkeypatch.setenv("DOWNLINK_EVENT_ALLOWLIST", "error, response.output_audio.delta,")
+    assert _load_allowlist() == frozenset({"error", "response.output_audio.delta"})
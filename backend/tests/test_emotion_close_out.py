@@ -0,0 +1,55 @@
+import asyncio
+
+from app.api import voice
+from app.services import post_session
+from app.services.audio_recorder import BYTES_PER_SECOND, SessionAudioRecorder
+
+
+def _silent_recording(seconds: int = 10) -> SessionAudioRecorder:
+    recorder = SessionAudioRecorder()
+    for _ in range(seconds):
+        recorder.write(bytes(BYTES_PER_SECOND))
+    return recorder
+
+
+def test_silent_recording_queues_no_emotion_audio():
+    recorder = _silent_recording()
+    try:
+        assert asyncio.run(voice.collect_emotion_audio(recorder)) == (None, [])
+    finally:
+        recorder.close()
+
+
+def test_emotion_stage_without_voiced_audio_finishes_without_calling_hume(monkeypatch):
+    async def fail(*args):
+        raise AssertionError("Hume must not be called for a silent session")
+
+    saved = {}
+    monkeypatch.setattr(post_session, "analyze_emotion_windows", fail)
+    monkeypatch.setattr(post_session, "_save_results", lambda job_id, results: saved.update(results) or {})
+
+    # What close-out would have queued for a muted session before the fix
+    job = {
+        "user_id": 1,
+        "conversation_id": 1,
+        "summary": None,
+        "stages": ["emotion"],
+        "transcript": [],
+        "audio": b"",
+        "audio_windows": [],
+        "trace": None,
+    }
+    assert asyncio.run(post_session._run_stages(7, job)) == {}
+    assert saved == {"emotion": None}
+
+
+def test_failed_window_extraction_falls_back_to_no_emotion_stage(monkeypatch):
+    def broken(recorder):
+        raise OSError("mmap failed")
+
+    monkeypatch.setattr(voice, "extract_windows", broken)
+    recorder = _silent_recording(1)
+    try:
+        assert asyncio.run(voice.collect_emotion_audio(recorder, 1)) == (None, [])
+    finally:
+        recorder.close()
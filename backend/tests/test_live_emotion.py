@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from app.services import live_emotion
+from app.services.audio_recorder import BYTES_PER_SECOND, SessionAudioRecorder
+from app.services.audio_coalescer import SAMPLE_RATE
+
+
+def _tone(seconds: float) -> bytes:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16).tobytes()
+
+
+def test_turn_clips_are_prepared_off_the_event_loop(monkeypatch):
+    threads = []
+    prepare = live_emotion._prepare_clips
+
+    def spy(pcm, offset):
+        threads.append(threading.current_thread())
+        return prepare(pcm, offset)
+
+    async def no_predictions(clips):
+        clip_starts.extend(start for start, _ in clips)
+        return []
+
+    clip_starts = []
+    monkeypatch.setattr(live_emotion, "_prepare_clips", spy)
+    monkeypatch.setattr(live_emotion, "predict_windows", no_predictions)
+
+    async def run():
+        with SessionAudioRecorder() as recorder:
+            recorder.write(bytes(2 * BYTES_PER_SECOND) + _tone(2) + bytes(2 * BYTES_PER_SECOND))
+            analyzer = live_emotion.LiveEmotionAnalyzer(1, recorder)
+            analyzer.submit_turn(1.0, 5.0)
+            assert threads == []
+            # The relay keeps recording while the turn is analyzed
+            recorder.write(bytes(BYTES_PER_SECOND))
+            await analyzer.drain()
+
+    asyncio.run(run())
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
+    assert len(clip_starts) == 1 and 1.8 <= clip_starts[0] <= 2.0
+
+
+def test_turn_without_retained_audio_is_not_queued():
+    async def run():
+        with SessionAudioRecorder() as recorder:
+            analyzer = live_emotion.LiveEmotionAnalyzer(1, recorder)
+            analyzer.submit_turn(0.0, 1.0)
+            return analyzer._tasks
+
+    assert asyncio.run(run()) == set()
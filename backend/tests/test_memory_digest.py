@@ -0,0 +1,117 @@
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy.exc import IntegrityError
+
+from app.services import memory_digest, post_session
+
+
+def _fake_digest_calls(monkeypatch, latest, history):
+    calls, stored = [], []
+
+    async def generate(previous, summaries, profile_summary=None):
+        calls.append(list(summaries))
+        return (previous or "") + "".join(f"[{s}]" for s in summaries)
+
+    monkeypatch.setattr(memory_digest, "_load_digest_inputs", lambda user_id: (latest, "profile"))
+    monkeypatch.setattr(memory_digest, "_load_history", lambda user_id: history)
+    monkeypatch.setattr(memory_digest, "generate_memory_digest", generate)
+    monkeypatch.setattr(memory_digest, "_store_digest", lambda *args: stored.append(args))
+    return calls, stored
+
+
+def test_first_digest_is_seeded_from_existing_summaries(monkeypatch):
+    # A user with 40 sessions summarized before digests existed, plus the one just summarized
+    history = [SimpleNamespace(id=i, summary=f"s{i}") for i in range(41)]
+    calls, stored = _fake_digest_calls(monkeypatch, None, history)
+
+    asyncio.run(memory_digest.update_memory_digest(1, 40, "s40"))
+
+    assert [s for batch in calls for s in batch] == [f"s{i}" for i in range(41)]
+    assert len(calls) == 5  # MEMORY_DIGEST_REPLAY_BATCH summaries per call
+    (user_id, version, content, conversation_ids), = stored
+    assert version == 1 and "[s0]" in content and "[s40]" in content
+    assert conversation_ids == list(range(41))
+
+
+def test_existing_digest_folds_only_the_new_summary(monkeypatch):
+    latest = SimpleNamespace(version=3, content="memory", conversation_ids=[1, 2])
+    calls, stored = _fake_digest_calls(monkeypatch, latest, [])
+
+    asyncio.run(memory_digest.update_memory_digest(1, 3, "s3"))
+
+    assert calls == [["s3"]]
+    assert stored == [(1, 4, "memory[s3]", [1, 2, 3])]
+
+
+def _rebuild_fakes(monkeypatch, histories, store_failures=0):
+    calls, stored = [], []
+    histories = iter(histories)
+
+    async def generate(previous, summaries, profile_summary=None):
+        calls.append(list(summaries))
+        return (previous or "") + "".join(f"[{s}]" for s in summaries)
+
+    def store(user_id, version, content, conversation_ids):
+        if len(stored) < store_failures:
+            stored.append(None)
+            raise IntegrityError("insert", {}, Exception("duplicate version"))
+        stored.append((version, content, conversation_ids))
+
+    async def invalidate(user_id):
+        pass
+
+    monkeypatch.setattr(memory_digest, "_load_digest_inputs", lambda user_id: (None, None))
+    monkeypatch.setattr(memory_digest, "_load_history", lambda user_id: next(histories))
+    monkeypatch.setattr(memory_digest, "generate_memory_digest", generate)
+    monkeypatch.setattr(memory_digest, "_store_digest", store)
+    monkeypatch.setattr(memory_digest.context_cache, "invalidate", invalidate)
+    return calls, stored
+
+
+def _history(*ids):
+    return [SimpleNamespace(id=i, summary=f"s{i}") for i in ids]
+
+
+def test_rebuild_folds_conversations_summarized_during_the_replay(monkeypatch):
+    calls, stored = _rebuild_fakes(monkeypatch, [_history(1, 2), _history(1, 2, 3), _history(1, 2, 3)])
+
+    asyncio.run(memory_digest.rebuild_memory_digest(1))
+
+    assert calls == [["s1", "s2"], ["s3"]]
+    # The version is picked when storing, not when the rebuild started
+    assert stored == [(None, "[s1][s2][s3]", [1, 2, 3])]
+
+
+def test_rebuild_starts_over_when_a_replayed_conversation_is_deleted(monkeypatch):
+    calls, stored = _rebuild_fakes(monkeypatch, [_history(1, 2), _history(1), _history(1)])
+
+    asyncio.run(memory_digest.rebuild_memory_digest(1))
+
+    assert calls == [["s1", "s2"], ["s1"]]
+    assert stored == [(None, "[s1]", [1])]
+
+
+def test_rebuild_retries_the_insert_when_an_update_takes_its_version(monkeypatch):
+    _, stored = _rebuild_fakes(monkeypatch, [_history(1), _history(1)], store_failures=1)
+
+    asyncio.run(memory_digest.rebuild_memory_digest(1))
+
+    assert stored == [None, (None, "[s1]", [1])]
+
+
+def test_rebuild_job_runs_through_the_post_session_queue(monkeypatch):
+    rebuilt, saved = [], {}
+
+    async def rebuild(user_id):
+        rebuilt.append(user_id)
+
+    monkeypatch.setattr(post_session, "rebuild_memory_digest", rebuild)
+    monkeypatch.setattr(post_session, "_save_results", lambda job_id, results: saved.update(results) or {})
+    job = {
+        "user_id": 42, "conversation_id": None, "summary": None, "stages": [post_session.DIGEST_REBUILD_STAGE],
+        "transcript": [], "audio": None, "audio_windows": [], "trace": None,
+    }
+
+    assert asyncio.run(post_session._run_stages(1, job)) == {}
+    assert rebuilt == [42] and post_session.DIGEST_REBUILD_STAGE in saved
@@ -0,0 +1,47 @@
+import json
+
+from app.services.realtime_events import TYPE_SCAN_LIMIT, classify_event, peek_event_type
+
+
+def test_type_at_the_start_is_read_without_parsing():
+    # Not valid JSON past the type: only the scan can have produced the answer
+    assert peek_event_type('{"type": "response.output_audio.delta", "delta": "AAAA') == "response.output_audio.delta"
+
+
+def test_nested_type_before_the_top_level_one_is_not_trusted():
+    message = json.dumps({"item": {"type": "message"}, "type": "conversation.item.created"})
+    assert peek_event_type(message) == "conversation.item.created"
+
+
+def test_type_inside_an_array_before_the_top_level_one_is_not_trusted():
+    message = json.dumps({"content": [{"type": "input_audio"}], "type": "conversation.item.created"})
+    assert peek_event_type(message) == "conversation.item.created"
+
+
+def test_type_beyond_the_scan_limit_falls_back_to_a_parse():
+    message = json.dumps({"padding": "x" * TYPE_SCAN_LIMIT, "type": "error"})
+    assert peek_event_type(message) == "error"
+
+
+def test_escaped_type_falls_back_to_a_parse():
+    message = json.dumps({"type": 'odd"type'})
+    assert peek_event_type(message) == 'odd"type'
+
+
+def test_invalid_or_non_object_messages_have_no_type():
+    assert peek_event_type("not json") is None
+    assert peek_event_type(json.dumps(["type", "error"])) is None
+    assert peek_event_type(json.dumps({"no_type": True})) is None
+
+
+def test_only_inspected_events_are_decoded():
+    audio = json.dumps({"type": "response.output_audio.delta", "delta": "AAAA"})
+    transcript = json.dumps({"type": "response.output_audio_transcript.done", "transcript": "Hi"})
+
+    assert classify_event(audio) == ("response.output_audio.delta", None)
+    assert classify_event(transcript) == ("response.output_audio_transcript.done", json.loads(transcript))
+
+
+def test_inspected_event_that_fails_to_decode_is_unclassified():
+    broken = '{"type": "response.output_audio_transcript.done", "transcript": '
+    assert classify_event(broken) == (None, None)
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+from app.api import voice
+from app.services import moderation
+
+NOT_FLAGGED = moderation.NOT_FLAGGED
+FLAGGED = {"flagged": True, "categories": {"harassment": True}}
+
+
+class _Upstream:
+    def __init__(self, events):
+        self.messages = [json.dumps(event) for event in events]
+        self.closed = False
+
+    async def __aiter__(self):
+        for message in self.messages:
+            yield message
+
+    async def send(self, data):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class _Client:
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000, reason: str | None = None):
+        self.close_code = code
+
+
+def _turn(user_text: str, assistant_text: str) -> list[dict]:
+    return [
+        {"type": "conversation.item.input_audio_transcription.completed", "transcript": user_text},
+        {"type": "response.output_audio_transcript.done", "transcript": assistant_text},
+    ]
+
+
+def _relay(events, flagged_texts, monkeypatch):
+    async def check(texts, user_id):
+        return [FLAGGED if text in flagged_texts else NOT_FLAGGED for text in texts]
+
+    monkeypatch.setattr(moderation, "check_content_moderation", check)
+    upstream, client, transcript = _Upstream(events), _Client(), []
+    asyncio.run(voice.relay_openai_to_client(upstream, client, transcript, 1, 1))
+    return transcript, upstream, client
+
+
+def test_flagged_turn_is_removed_by_identity(monkeypatch):
+    # "no" is a substring of the earlier, clean turn; only the flagged turn goes
+    transcript, upstream, client = _relay(_turn("I know nothing", "Okay") + _turn("no", "Sure"), {"no"}, monkeypatch)
+
+    assert transcript == [
+        {"role": "user", "content": "I know nothing"},
+        {"role": "assistant", "content": "Okay"},
+        {"role": "assistant", "content": "Sure"},
+    ]
+    assert client.close_code == 1008
+    assert upstream.closed
+
+
+def test_turns_pending_at_hang_up_are_moderated_before_returning(monkeypatch):
+    # The relay ends right after the last turn; the verdict still lands before close-out
+    transcript, _, _ = _relay(_turn("fine", "Good") + _turn("bad words", "Hm"), {"bad words"}, monkeypatch)
+
+    assert {"role": "user", "content": "bad words"} not in transcript
+    assert {"role": "user", "content": "fine"} in transcript
+
+
+def test_socket_is_closed_even_if_the_notice_fails(monkeypatch):
+    class _BrokenClient(_Client):
+        async def send_text(self, data):
+            if "content_policy_violation" in data:
+                raise RuntimeError("socket gone")
+            self.sent.append(data)
+
+    async def check(texts, user_id):
+        return [FLAGGED] * len(texts)
+
+    monkeypatch.setattr(moderation, "check_content_moderation", check)
+    client = _BrokenClient()
+    asyncio.run(voice.relay_openai_to_client(_Upstream(_turn("bad", "Hm")), client, [], 1, 1))
+    assert client.close_code == 1008
+
+
+def test_downlink_counters_are_exported_at_close_out(monkeypatch):
+    from app.services import metrics
+
+    before = metrics.DOWNLINK_EVENTS.labels("response.output_audio_transcript.done", "dropped")._value.get()
+    _relay(_turn("fine", "Good"), set(), monkeypatch)
+    after = metrics.DOWNLINK_EVENTS.labels("response.output_audio_transcript.done", "dropped")._value.get()
+    assert after == before + 1
@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services import session_context
+from app.services.context_cache import LocalContextCache, context_cache
+
+
+class _TrackedSessions:
+    """Stand-in for AsyncSessionLocal that counts sessions currently open."""
+
+    def __init__(self):
+        self.open = 0
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        self.open += 1
+        return object()
+
+    async def __aexit__(self, *exc):
+        self.open -= 1
+
+
+def test_profile_is_embedded_with_no_session_open(monkeypatch):
+    sessions = _TrackedSessions()
+    open_while_embedding = []
+
+    async def embed(profile_summary):
+        open_while_embedding.append(sessions.open)
+        return [0.1, 0.2]
+
+    async def retrieve(db, user, query_embedding):
+        assert sessions.open == 1
+        return f"HISTORY for {query_embedding}\n"
+
+    async def nothing(db, user_id, *args):
+        return None
+
+    async def no_items(db, user_id):
+        return []
+
+    monkeypatch.setattr(session_context, "AsyncSessionLocal", sessions)
+    monkeypatch.setattr(session_context, "profile_embedding", embed)
+    monkeypatch.setattr(session_context, "retrieve_context", retrieve)
+    monkeypatch.setattr(session_context, "get_latest_memory_digest", nothing)
+    monkeypatch.setattr(session_context, "get_open_action_items", no_items)
+
+    user = SimpleNamespace(id=1, profile_summary="Wants to set boundaries at work")
+    context = asyncio.run(session_context.build_user_context(user))
+
+    assert open_while_embedding == [0]
+    assert "HISTORY for [0.1, 0.2]" in context
+
+
+def test_context_invalidated_while_building_is_not_cached(monkeypatch):
+    user = SimpleNamespace(id=7, profile_summary=None)
+
+    async def build_user_context(user):
+        # A post-session worker stores a new summary while this build reads the old one
+        await context_cache.invalidate(user.id)
+        return "stale context"
+
+    monkeypatch.setattr(session_context, "build_user_context", build_user_context)
+
+    assert asyncio.run(session_context.get_user_context(user)) == "stale context"
+    assert asyncio.run(context_cache.get(user.id)) is None
+
+
+def test_context_is_cached_when_nothing_changed(monkeypatch):
+    user = SimpleNamespace(id=8, profile_summary=None)
+
+    async def build_user_context(user):
+        return "fresh context"
+
+    monkeypatch.setattr(session_context, "build_user_context", build_user_context)
+
+    asyncio.run(session_context.get_user_context(user))
+    assert asyncio.run(context_cache.get(user.id)) == "fresh context"
+
+
+def test_local_generation_never_goes_back_after_eviction():
+    cache = LocalContextCache(size=1)
+
+    async def scenario():
+        before = await cache.generation("a")
+        await cache.delete("a")
+        await cache.delete("b")  # evicts a's generation
+        return await cache.set("a", "stale", before)
+
+    assert asyncio.run(scenario()) is False
@@ -1,6 +1,6 @@
 import { useState, useRef, useEffect } from 'react';
 import VoiceWaveform from './VoiceWaveform';
-import { WS_URL, API_URL } from '../config';
+import { WS_URL, API_URL, BINARY_AUDIO } from '../config';
 
 function Onboarding({ token, userId, onComplete }) {
   const [isActive, setIsActive] = useState(false);
@@ -68,6 +68,11 @@ function Onboarding({ token, userId, onComplete }) {
       workletNodeRef.current.port.onmessage = (event) => {
         if (wsRef.current?.readyState === WebSocket.OPEN) {
           const pcm16 = event.data;
+          if (BINARY_AUDIO) {
+            // Raw PCM16 binary frame, the backend wraps it for OpenAI
+            wsRef.current.send(pcm16);
+            return;
+          }
           const base64 = btoa(String.fromCharCode(...new Uint8Array(pcm16)));
           wsRef.current.send(JSON.stringify({
             type: 'input_audio_buffer.append',
@@ -1,7 +1,7 @@
 import { useState, useRef } from 'react';
 import { useQueryClient } from '@tanstack/react-query';
 import VoiceWaveform from './VoiceWaveform';
-import { WS_URL } from '../config';
+import { WS_URL, BINARY_AUDIO } from '../config';
 
 function VoiceChat({ token, userId }) {
   const queryClient = useQueryClient();
@@ -86,10 +86,15 @@ function VoiceChat({ token, userId }) {
       // Receive processed audio from worklet
       workletNode.port.onmessage = (e) => {
         const pcm16Buffer = e.data;
-        const uint8Array = new Uint8Array(pcm16Buffer);
-        const base64 = btoa(String.fromCharCode(...uint8Array));
         
         if (wsRef.current?.readyState === WebSocket.OPEN) {
+          if (BINARY_AUDIO) {
+            // Raw PCM16 binary frame, the backend wraps it for OpenAI
+            wsRef.current.send(pcm16Buffer);
+            return;
+          }
+          const uint8Array = new Uint8Array(pcm16Buffer);
+          const base64 = btoa(String.fromCharCode(...uint8Array));
           wsRef.current.send(JSON.stringify({
             type: 'input_audio_buffer.append',
             audio: base64
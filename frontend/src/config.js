@@ -6,3 +6,6 @@ export const WS_URL = import.meta.env.VITE_WS_URL ||
     ? API_URL.replace('https', 'wss') 
     : API_URL.replace('http', 'ws'));
 
+
+// Opt in (VITE_BINARY_AUDIO=true) to send mic audio as raw PCM16 binary frames instead of base64 JSON
+export const BINARY_AUDIO = import.meta.env.VITE_BINARY_AUDIO === 'true';